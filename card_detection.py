@@ -0,0 +1,193 @@
+import numpy as np
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+# Preview frames are analysed at this width; outline and focus survive the downscale
+ANALYSIS_WIDTH = 320
+# The card must fill at least this much of the preview to be worth capturing
+MIN_CARD_FRACTION = 0.15
+# Laplacian variance of the card area at analysis size; below this the text is smeared
+MIN_SHARPNESS = 60.0
+# Corners may move this far (fraction of the frame) between analyses and still count as steady
+STABLE_TOLERANCE = 0.02
+# Steady analyses in a row before capturing
+STABLE_FRAMES = 5
+
+# Scanned pages are segmented at this size
+SEGMENT_SIZE = 1000
+# A card on a scanned page covers at least this much of it
+MIN_REGION_FRACTION = 0.01
+# Long side / short side of a card; ISO, US and Japanese cards are 1.5-1.8
+CARD_ASPECT_RANGE = (1.2, 2.2)
+
+
+def order_corners(quad):
+    """Corners as top-left, top-right, bottom-right, bottom-left"""
+    quad = quad.reshape(4, 2).astype(np.float32)
+    sums = quad.sum(axis=1)
+    diffs = np.diff(quad, axis=1).ravel()
+    return np.array([quad[np.argmin(sums)], quad[np.argmin(diffs)],
+                     quad[np.argmax(sums)], quad[np.argmax(diffs)]], dtype=np.float32)
+
+
+def find_card_quad(edges, min_area):
+    """Largest four-cornered outline in an edge map, or None"""
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    for contour in sorted(contours, key=cv2.contourArea, reverse=True):
+        if cv2.contourArea(contour) < min_area:
+            break
+        hull = cv2.convexHull(contour)
+        approx = cv2.approxPolyDP(hull, 0.02 * cv2.arcLength(hull, True), True)
+        if len(approx) == 4:
+            return order_corners(approx)
+    return None
+
+
+class CardDetector:
+    """Card outline and sharpness of camera preview frames.
+
+    Work buffers are allocated for the first frame size and reused, so analysing a
+    frame allocates almost nothing; one detector must only be used by one thread.
+    """
+
+    def __init__(self, analysis_width=ANALYSIS_WIDTH):
+        self.analysis_width = analysis_width
+        self.frame_shape = None
+        self.kernel = np.ones((3, 3), np.uint8)
+
+    def _allocate(self, shape):
+        height, width = shape[:2]
+        scale = self.analysis_width / float(width)
+        self.small_size = (self.analysis_width, max(int(round(height * scale)), 1))
+        small_shape = (self.small_size[1], self.small_size[0])
+        self.gray = np.empty((height, width), np.uint8)
+        self.small = np.empty(small_shape, np.uint8)
+        self.blurred = np.empty(small_shape, np.uint8)
+        self.edges = np.empty(small_shape, np.uint8)
+        self.dilated = np.empty(small_shape, np.uint8)
+        self.laplacian = np.empty(small_shape, np.float32)
+        self.frame_shape = shape
+
+    def analyze(self, frame):
+        """Analyse an RGBA (or grey) frame array.
+
+        Returns a dict with found, corners (tl, tr, br, bl as fractions of the frame
+        size), area (fraction of the frame) and sharpness.
+        """
+        if frame.shape != self.frame_shape:
+            self._allocate(frame.shape)
+        if frame.ndim == 3:
+            code = cv2.COLOR_RGBA2GRAY if frame.shape[2] == 4 else cv2.COLOR_RGB2GRAY
+            gray = cv2.cvtColor(frame, code, dst=self.gray)
+        else:
+            gray = frame
+        cv2.resize(gray, self.small_size, dst=self.small, interpolation=cv2.INTER_AREA)
+        cv2.GaussianBlur(self.small, (5, 5), 0, dst=self.blurred)
+        cv2.Canny(self.blurred, 50, 150, edges=self.edges)
+        # Close small gaps in the card border
+        cv2.dilate(self.edges, self.kernel, dst=self.dilated)
+
+        width, height = self.small_size
+        quad = find_card_quad(self.dilated, MIN_CARD_FRACTION * width * height)
+        if quad is None:
+            return {'found': False, 'corners': None, 'area': 0.0, 'sharpness': 0.0}
+
+        # Focus is measured inside the card; its border and the background say nothing
+        cv2.Laplacian(self.small, cv2.CV_32F, dst=self.laplacian)
+        (x0, y0), (x1, y1) = quad.min(axis=0), quad.max(axis=0)
+        inset_x, inset_y = 0.1 * (x1 - x0), 0.1 * (y1 - y0)
+        inner = self.laplacian[int(y0 + inset_y):int(np.ceil(y1 - inset_y)),
+                               int(x0 + inset_x):int(np.ceil(x1 - inset_x))]
+        _, std = cv2.meanStdDev(inner)
+        return {
+            'found': True,
+            'corners': quad / np.array([width, height], np.float32),
+            'area': cv2.contourArea(quad) / float(width * height),
+            'sharpness': float(std[0, 0]) ** 2,
+        }
+
+
+class AutoCapture:
+    """Decide when a card has been held steady long enough, keeping its sharpest frame"""
+
+    def __init__(self, stable_frames=STABLE_FRAMES, tolerance=STABLE_TOLERANCE, min_sharpness=MIN_SHARPNESS):
+        self.stable_frames = stable_frames
+        self.tolerance = tolerance
+        self.min_sharpness = min_sharpness
+        self.best = None
+        self.reset()
+
+    def reset(self):
+        self.corners = None
+        self.steady = 0
+        self.best_sharpness = -1.0
+
+    def update(self, result, frame):
+        """Feed one analysis and its frame; returns True once the card is ready"""
+        if not result['found']:
+            self.reset()
+            return False
+        moved = (self.corners is None or
+                 np.abs(result['corners'] - self.corners).max() > self.tolerance)
+        self.corners = result['corners']
+        if moved:
+            self.steady = 0
+            self.best_sharpness = -1.0
+            return False
+
+        self.steady += 1
+        if result['sharpness'] >= self.min_sharpness and result['sharpness'] > self.best_sharpness:
+            if self.best is None or self.best.shape != frame.shape:
+                self.best = np.empty_like(frame)
+            np.copyto(self.best, frame)
+            self.best_sharpness = result['sharpness']
+        return self.steady >= self.stable_frames and self.best_sharpness >= 0
+
+    def best_frame(self):
+        """The sharpest steady frame seen since the card last moved"""
+        return self.best if self.best_sharpness >= 0 else None
+
+
+# ---------- SCANNED PAGES ----------
+def find_card_regions(gray, min_fraction=MIN_REGION_FRACTION, aspect_range=CARD_ASPECT_RANGE):
+    """Boxes (x, y, w, h) of card-shaped regions on a scanned page, in reading order.
+
+    gray is the page as a 2-D uint8 array; boxes are in its pixel coordinates.
+    """
+    height, width = gray.shape
+    scale = min(1.0, SEGMENT_SIZE / float(max(height, width)))
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1 else gray
+    # Card borders on a scanner lid are faint shadows; a low gradient threshold still sees them
+    gradient = cv2.morphologyEx(cv2.GaussianBlur(small, (3, 3), 0), cv2.MORPH_GRADIENT,
+                                np.ones((3, 3), np.uint8))
+    _, edges = cv2.threshold(gradient, 6, 255, cv2.THRESH_BINARY)
+    # Merge each card's border and text into one solid blob
+    closed = cv2.morphologyEx(edges, cv2.MORPH_CLOSE, np.ones((9, 9), np.uint8))
+    contours, _ = cv2.findContours(closed, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    min_area = min_fraction * small.shape[0] * small.shape[1]
+    boxes = []
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if w * h < min_area:
+            continue
+        if not aspect_range[0] <= max(w, h) / float(min(w, h)) <= aspect_range[1]:
+            continue
+        boxes.append((int(x / scale), int(y / scale),
+                      min(int(np.ceil(w / scale)), width), min(int(np.ceil(h / scale)), height)))
+    if not boxes:
+        return []
+
+    # Rows of cards top to bottom, left to right within a row
+    half_height = np.median([h for _, _, _, h in boxes]) / 2.0
+    rows = []
+    for box in sorted(boxes, key=lambda b: b[1]):
+        if rows and box[1] - rows[-1][0][1] < half_height:
+            rows[-1].append(box)
+        else:
+            rows.append([box])
+    return [box for row in rows for box in sorted(row)]
+
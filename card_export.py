@@ -0,0 +1,117 @@
+import argparse
+import importlib.util
+import json
+import os
+
+import card_storage
+
+# Low-cardinality columns stored dictionary-encoded
+DICTIONARY_COLUMNS = ['Company', 'Designation']
+EXPORT_FORMATS = ('parquet', 'arrow')
+
+
+def available():
+    """pyarrow is an optional install (requirements_export.txt); only the export needs it"""
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def export_schema(columns):
+    """Arrow schema for the contact table: strings, dictionary-encoded where it pays off"""
+    import pyarrow as pa
+
+    fields = []
+    for column in columns:
+        if column in DICTIONARY_COLUMNS:
+            fields.append(pa.field(column, pa.dictionary(pa.int32(), pa.string())))
+        else:
+            fields.append(pa.field(column, pa.string()))
+    return pa.schema(fields)
+
+
+def completeness(counts, total):
+    """Completeness statistics in the same terms as the Database Statistics section"""
+    stats = {'Total': total}
+    for column, filled in counts.items():
+        stats[f"With {column}"] = filled
+    return stats
+
+
+def count_filled(chunk, counts):
+    """Add the non-empty values of each counted column in a chunk to counts"""
+    for column in counts:
+        counts[column] += int((chunk[column] != '').sum()) if column in chunk else 0
+
+
+def export_database(csv_path, out_path, file_format='parquet', row_group_size=50000):
+    """Write the contact table as Parquet or an Arrow IPC stream, one row group per chunk read from storage.
+
+    The completeness statistics go in the file metadata under card_reader.completeness:
+    the Parquet footer, or the schema at the head of the Arrow stream.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {file_format}")
+    columns = card_storage.read_header(csv_path) or card_storage.CONTACT_COLUMNS
+    schema = export_schema(columns)
+    counts = {column: 0 for column in columns if column not in ('Id', 'Image_Path')}
+    total = 0
+
+    # One shared lock for both passes, so the counts describe the rows written
+    with card_storage.database_lock(csv_path, shared=True):
+        if file_format == 'parquet':
+            writer = pq.ParquetWriter(out_path, schema, use_dictionary=DICTIONARY_COLUMNS, compression='zstd')
+        else:
+            # The stream schema is written before the first batch, so count in a first pass
+            for chunk in card_storage.iter_database_chunks(csv_path, chunksize=row_group_size,
+                                                           usecols=list(counts), lock=False):
+                total += len(chunk)
+                count_filled(chunk, counts)
+            stats = completeness(counts, total)
+            # The stream format allows each batch to carry its own dictionaries
+            writer = pa.ipc.new_stream(out_path, schema.with_metadata(
+                {'card_reader.completeness': json.dumps(stats)}))
+
+        try:
+            for chunk in card_storage.iter_database_chunks(csv_path, chunksize=row_group_size, lock=False):
+                chunk = chunk.reindex(columns=columns, fill_value='')
+                if file_format == 'parquet':
+                    total += len(chunk)
+                    count_filled(chunk, counts)
+                # Empty strings become nulls so Parquet null counts carry the completeness too
+                chunk = chunk.mask(chunk == '')
+                table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+                if file_format == 'parquet':
+                    writer.write_table(table, row_group_size=row_group_size)
+                else:
+                    writer.write_table(table, max_chunksize=row_group_size)
+
+            if file_format == 'parquet':
+                stats = completeness(counts, total)
+                writer.add_key_value_metadata({'card_reader.completeness': json.dumps(stats)})
+        finally:
+            writer.close()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the card database as Parquet or Arrow IPC")
+    parser.add_argument('--db', default=os.path.join('visiting_cards_data', 'cards_data.csv'))
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default='parquet')
+    parser.add_argument('--out', help="Output file (default: next to the database)")
+    parser.add_argument('--row-group-size', type=int, default=50000)
+    args = parser.parse_args()
+    if not available():
+        parser.error("pyarrow is not installed: pip install -r requirements_export.txt")
+
+    out_path = args.out or os.path.splitext(args.db)[0] + ('.parquet' if args.format == 'parquet' else '.arrows')
+    stats = export_database(args.db, out_path, args.format, args.row_group_size)
+    print(f"Wrote {stats['Total']} contacts to {out_path}")
+    for key, value in stats.items():
+        if key != 'Total':
+            print(f"  {key}: {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,316 @@
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+FIELD_NAMES = ['name', 'email', 'phone', 'website', 'company', 'designation', 'address']
+
+# ---------- INPUT LIMITS ----------
+# A card holds a few hundred characters; anything far beyond that is OCR noise,
+# and capping it bounds the cost of every pattern below
+MAX_TEXT_LENGTH = 5000
+MAX_LINES = 80
+MAX_LINE_LENGTH = 200
+
+# Local part and domain are bounded (RFC 5321 limits), so a long run of
+# address-like junk cannot make the scan quadratic
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]{1,64}@[A-Za-z0-9.-]{1,253}\.[A-Za-z]{2,24}\b')
+PHONE_PATTERNS = [re.compile(p) for p in (
+    r'[\+]?[9][1]?[-\s]?[6-9]\d{9}',
+    r'[6-9]\d{9}',
+    r'\+\d{1,3} \d{10}',
+    r'\d{5} \d{5}',
+    r'\d{3}[-.\s]?\d{3}[-.\s]?\d{4}',
+    r'\(\d{3}\)\s*\d{3}[-.\s]?\d{4}',
+)]
+NUMBER_PATTERN = re.compile(r'\d')
+PINCODE_PATTERN = re.compile(r'\b\d{6}\b')
+STREET_PATTERN = re.compile(r'street|st|road|rd|avenue|ave|boulevard|blvd|lane|ln|drive|dr')
+BUILDING_PATTERN = re.compile(r'apartment|apt|flat|building|bldg|block|sector|phase|floor|fl|suite|ste')
+CITY_PATTERN = re.compile(r'\b(mumbai|delhi|bangalore|bengaluru|chennai|kolkata|hyderabad|pune|ahmedabad|surat|jaipur|zirakpur|mohali|chandigarh|gurgaon|noida)\b')
+AREA_PATTERN = re.compile(r'nagar|colony|area|locality|sector|district|state')
+BLOCK_STREET_PATTERN = re.compile(r'street|st|road|rd|avenue|ave')
+BLOCK_BUILDING_PATTERN = re.compile(r'apartment|building|block|sector')
+NON_ADDRESS_PATTERN = re.compile(r'@|http|www|\.com|\.net|gmail|yahoo')
+
+
+def clip_text(text):
+    """OCR text cut to MAX_LINES lines of MAX_LINE_LENGTH characters, MAX_TEXT_LENGTH in all.
+
+    Returns (text, truncated).
+    """
+    truncated = len(text) > MAX_TEXT_LENGTH
+    lines = text[:MAX_TEXT_LENGTH].split('\n')
+    if len(lines) > MAX_LINES:
+        lines = lines[:MAX_LINES]
+        truncated = True
+    if any(len(line) > MAX_LINE_LENGTH for line in lines):
+        lines = [line[:MAX_LINE_LENGTH] for line in lines]
+        truncated = True
+    return '\n'.join(lines), truncated
+
+
+# ---------- IMPROVED EXTRACTION FUNCTIONS ----------
+def extract_email(text):
+    """Extract email address from text"""
+    try:
+        if '@' not in text:
+            return ""
+        match = EMAIL_PATTERN.search(text)
+        return match.group(0) if match else ""
+    except Exception as e:
+        return ""
+
+def extract_website_from_email(email):
+    """Extract website from email - everything after @"""
+    if not email:
+        return ""
+    try:
+        website = email.split('@')[1]
+        return website
+    except:
+        return ""
+
+def extract_company_from_email(email):
+    """Extract company name from email - remove TLD"""
+    if not email:
+        return ""
+    try:
+        domain = email.split('@')[1]
+        company = re.sub(r'\.(com|net|org|in|co|us|uk|info|biz)$', '', domain)
+        company = company.replace('-', ' ').replace('_', ' ').title()
+        return company
+    except:
+        return ""
+
+def extract_phone_numbers(text):
+    """Extract phone numbers from text"""
+    try:
+        phones = []
+        for pattern in PHONE_PATTERNS:
+            matches = pattern.findall(text)
+            for match in matches:
+                clean_phone = re.sub(r'[^\d\+]', '', match)
+                if len(clean_phone) >= 10 and clean_phone not in phones:
+                    phones.append(clean_phone)
+        
+        return phones[0] if phones else ""
+    except Exception as e:
+        return ""
+
+def extract_name(text_lines):
+    """Extract name from text lines"""
+    try:
+        # Look for name in first 3 lines
+        for i, line in enumerate(text_lines[:3]):
+            clean_line = line.strip()
+            if len(clean_line) < 2 or len(clean_line) > 50:
+                continue
+            # Skip lines with emails, websites, or phone numbers
+            if (re.search(r'@|www|\.com|\.net|\.org|\d{10}', clean_line.lower()) or
+                any(word in clean_line.lower() for word in ['company', 'ltd', 'inc', 'corp'])):
+                continue
+            
+            words = clean_line.split()
+            if 1 <= len(words) <= 4:
+                # Check for proper name capitalization
+                capital_words = sum(1 for word in words if word and word[0].isupper())
+                if capital_words >= len(words) * 0.7:
+                    return clean_line
+        
+        # Fallback: first line without obvious contact info
+        for line in text_lines[:5]:
+            clean_line = line.strip()
+            if (len(clean_line) >= 2 and 
+                not re.search(r'@|www|\.com|\.net|\d{10}', clean_line) and
+                len(clean_line.split()) <= 4):
+                return clean_line
+                
+        return ""
+    except Exception as e:
+        return ""
+
+def extract_designation(text_lines, extracted_name):
+    """Extract designation from text lines"""
+    try:
+        designation_keywords = [
+            'manager', 'director', 'engineer', 'developer', 'analyst', 'consultant', 
+            'specialist', 'executive', 'officer', 'president', 'ceo', 'cto', 'cfo', 
+            'vp', 'head', 'lead', 'senior', 'junior', 'associate', 'assistant',
+            'architect', 'designer', 'coordinator', 'administrator', 'supervisor',
+            'chief', 'partner', 'founder', 'owner', 'principal', 'neurologist', 
+            'doctor', 'physician', 'surgeon', 'sales', 'marketing', 'hr', 'finance'
+        ]
+        
+        # Find name position
+        name_index = -1
+        for i, line in enumerate(text_lines):
+            if line.strip() == extracted_name:
+                name_index = i
+                break
+        
+        # Check line after name (most common)
+        if name_index != -1 and name_index + 1 < len(text_lines):
+            next_line = text_lines[name_index + 1].strip()
+            if (2 <= len(next_line) <= 60 and 
+                not re.search(r'@|www|\.com|\.net|\d{10}', next_line.lower()) and
+                any(keyword in next_line.lower() for keyword in designation_keywords)):
+                return next_line
+        
+        # Check line before name
+        if name_index > 0:
+            prev_line = text_lines[name_index - 1].strip()
+            if (2 <= len(prev_line) <= 60 and 
+                not re.search(r'@|www|\.com|\.net|\d{10}', prev_line.lower()) and
+                any(keyword in prev_line.lower() for keyword in designation_keywords)):
+                return prev_line
+        
+        # Search all lines for designation keywords
+        for line in text_lines:
+            clean_line = line.strip()
+            if (clean_line != extracted_name and
+                2 <= len(clean_line) <= 60 and
+                any(keyword in clean_line.lower() for keyword in designation_keywords)):
+                if not (re.search(r'@|www|\.com|\.net', clean_line.lower()) or 
+                       re.search(r'\d{10}', clean_line)):
+                    return clean_line
+        
+        return ""
+    except Exception as e:
+        return ""
+
+def extract_company_name(text_lines, extracted_email):
+    """Extract company name from text"""
+    try:
+        # First priority: company from email domain
+        company_from_email = extract_company_from_email(extracted_email)
+        if company_from_email:
+            return company_from_email
+        
+        # Look for company name in prominent positions
+        company_keywords = [
+            'ltd', 'inc', 'corporation', 'company', 'corp', 'private', 'limited', 
+            'tech', 'solutions', 'enterprises', 'group', 'industries', 'systems', 
+            'technologies', 'international', 'global', 'holdings', 'ventures'
+        ]
+        
+        # Check lines that look like company names
+        for line in text_lines:
+            clean_line = line.strip()
+            if (3 <= len(clean_line) <= 60 and
+                not re.search(r'@|www|\.com|\.net|\d{10}', clean_line.lower())):
+                
+                # Check for company keywords
+                if any(keyword in clean_line.lower() for keyword in company_keywords):
+                    return clean_line
+                
+                # Check for multi-word capitalized names
+                words = clean_line.split()
+                if len(words) >= 2:
+                    capital_words = sum(1 for word in words if word and word[0].isupper())
+                    if capital_words >= len(words) * 0.6:
+                        return clean_line
+        
+        return ""
+    except Exception as e:
+        return ""
+
+def extract_address(text):
+    """Extract company address from text - IMPROVED"""
+    try:
+        lines = text.split('\n')
+        address_lines = []
+        
+        # More comprehensive address detection
+        for i, line in enumerate(lines):
+            clean_line = line.strip()
+            if len(clean_line) < 5 or len(clean_line) > 100:
+                continue
+                
+            # Address indicators
+            lower_line = clean_line.lower()
+            has_number = bool(NUMBER_PATTERN.search(clean_line))
+            has_street = bool(STREET_PATTERN.search(lower_line))
+            has_building = bool(BUILDING_PATTERN.search(lower_line))
+            has_city = bool(CITY_PATTERN.search(lower_line))
+            has_pincode = bool(PINCODE_PATTERN.search(clean_line))
+            has_area = bool(AREA_PATTERN.search(lower_line))
+            
+            # Calculate address score
+            address_score = sum([has_number, has_street, has_building, has_city, has_pincode, has_area])
+            
+            # Strong indicators
+            if has_pincode and has_number:
+                address_lines.append(clean_line)
+            elif address_score >= 3:
+                address_lines.append(clean_line)
+            elif has_number and (has_street or has_building):
+                address_lines.append(clean_line)
+        
+        # Also look for consecutive address lines
+        if len(address_lines) < 2:
+            for i in range(len(lines) - 2):
+                block_lines = lines[i:i+3]
+                block_text = ' '.join(block_lines)
+                lower_block = block_text.lower()
+                
+                block_score = 0
+                if NUMBER_PATTERN.search(block_text):
+                    block_score += 1
+                if BLOCK_STREET_PATTERN.search(lower_block):
+                    block_score += 1
+                if PINCODE_PATTERN.search(block_text):
+                    block_score += 1
+                if BLOCK_BUILDING_PATTERN.search(lower_block):
+                    block_score += 1
+                
+                if block_score >= 3:
+                    address_lines = [line.strip() for line in block_lines if line.strip()]
+                    break
+        
+        # Clean and format address
+        if address_lines:
+            # Remove non-address lines
+            filtered_address = []
+            for line in address_lines:
+                if not NON_ADDRESS_PATTERN.search(line.lower()):
+                    filtered_address.append(line)
+            
+            if filtered_address:
+                # Join with proper formatting
+                address = ', '.join(filtered_address)
+                return address
+        
+        return ""
+    except Exception as e:
+        return ""
+
+def extract_all_fields(text):
+    """Extract all fields from OCR text - IMPROVED
+
+    Text beyond the input limits is cut off; the limits bound the time per card.
+    """
+    fields = dict.fromkeys(FIELD_NAMES, "")
+    try:
+        text, truncated = clip_text(text)
+        if truncated:
+            logger.warning("OCR text truncated to %d lines of %d characters (%d in all)",
+                           MAX_LINES, MAX_LINE_LENGTH, MAX_TEXT_LENGTH)
+        lines = [line.strip() for line in text.split('\n') if line.strip()]
+        
+        # Extract basic contact info first
+        fields['email'] = extract_email(text)
+        fields['phone'] = extract_phone_numbers(text)
+        fields['website'] = extract_website_from_email(fields['email'])
+        
+        # Extract name
+        fields['name'] = extract_name(lines)
+        
+        # Extract other fields using name as reference
+        fields['designation'] = extract_designation(lines, fields['name'])
+        fields['company'] = extract_company_name(lines, fields['email'])
+        fields['address'] = extract_address(text)
+        
+        return fields
+    except Exception as e:
+        return dict.fromkeys(FIELD_NAMES, "")
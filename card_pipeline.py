@@ -0,0 +1,111 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytesseract
+
+import card_detection
+import field_refinement
+import image_decode
+import image_preprocessing
+import ocr_tuning
+import qr_fastpath
+import script_detection
+from card_extraction import extract_all_fields
+
+OCR_CONFIG = r'--oem 3 --psm 6'
+# Tuned with ocr_tuning.py; also applies the tuned OMP_THREAD_LIMIT to tesseract
+PAGE_WORKERS = ocr_tuning.tuned_workers()
+
+
+def ocr_image(image, stats=None):
+    """Orient and preprocess a card image and return the OCR text.
+
+    The email and phone words get a second, whitelisted pass on their own crops.
+    stats, if given, receives the orientation/script pre-pass result and timings.
+    """
+    image, lang, osd = script_detection.prepare_for_ocr(image)
+    try:
+        processed_image = image_preprocessing.preprocess_image(image)
+    except Exception as e:
+        processed_image = image
+    start = time.perf_counter()
+    lines = field_refinement.ocr_lines(processed_image, lang=lang, config=OCR_CONFIG)
+    ocr_seconds = time.perf_counter() - start
+    try:
+        lines, refined = field_refinement.refine_lines(processed_image, lines)
+    except pytesseract.TesseractError:
+        refined = []
+    if stats is not None:
+        stats.update(osd, ocr_seconds=ocr_seconds, refined=refined,
+                     refine_seconds=time.perf_counter() - start - ocr_seconds)
+    return field_refinement.lines_text(lines)
+
+
+def process_card(image, stats=None):
+    """OCR a card image and extract its fields; fields is {} when no text was found"""
+    # A complete vCard/MeCard QR code makes OCR unnecessary
+    qr_fields = qr_fastpath.read_qr_fields(image)
+    if qr_fastpath.is_complete(qr_fields):
+        return '', qr_fastpath.fill_derived(qr_fields)
+
+    text = ocr_image(image, stats)
+    if not text.strip():
+        return text, qr_fields
+    fields = extract_all_fields(text)
+    if qr_fields:
+        fields, corrected = qr_fastpath.merge_fields(qr_fields, fields)
+    return text, fields
+
+
+def find_cards(image):
+    """Card boxes (x, y, w, h) on a scanned page, found on a downscaled grey copy"""
+    if card_detection.cv2 is None:
+        return []
+    small = image_decode.downscaled(image, card_detection.SEGMENT_SIZE)
+    scale = image.width / float(small.width)
+    boxes = card_detection.find_card_regions(np.asarray(small.convert('L')))
+    return [(int(x * scale), int(y * scale), int(w * scale), int(h * scale)) for x, y, w, h in boxes]
+
+
+def process_page(image, workers=None, regions=None):
+    """Process every card on a scanned page in parallel.
+
+    Returns a list of (region, text, fields); region is (x, y, w, h) on the page, or
+    None when the image holds a single card and was processed whole.
+    """
+    if regions is None:
+        regions = find_cards(image)
+    if len(regions) < 2:
+        text, fields = process_card(image_decode.downscaled(image, image_decode.WORKING_SIZE))
+        return [(None, text, fields)]
+
+    # Each crop copies only its own pixels; a page costs about as much as its slowest card.
+    # Callers may run pages in parallel too: ocr_tuning.tesseract_slots caps the total
+    crops = [image.crop((x, y, x + w, y + h)) for x, y, w, h in regions]
+    with ThreadPoolExecutor(max_workers=min(len(crops), workers or PAGE_WORKERS)) as executor:
+        results = list(executor.map(process_card, crops))
+    return [(region, text, fields) for region, (text, fields) in zip(regions, results)]
+
+
+def format_region(region):
+    """'x,y,w,h' for the Region column; '' for a whole image"""
+    return ','.join(str(v) for v in region) if region else ''
+
+
+def contact_record(fields, image_path='', source_page=None, region=None):
+    """Database row for extracted fields; cards cut from a page also record where they came from"""
+    record = {
+        'Name': fields.get('name', ''),
+        'Email': fields.get('email', ''),
+        'Phone': fields.get('phone', ''),
+        'Designation': fields.get('designation', ''),
+        'Company': fields.get('company', ''),
+        'Website': fields.get('website', ''),
+        'Address': fields.get('address', ''),
+        'Image_Path': image_path,
+    }
+    if region:
+        record['Source_Page'] = source_page or image_path
+        record['Region'] = format_region(region)
+    return record
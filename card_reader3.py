@@ -1,12 +1,23 @@
 import streamlit as st
-from PIL import Image, ImageEnhance
-import pytesseract
 import pandas as pd
 import io
 import base64
 import os
-import re
 import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from card_extraction import extract_all_fields
+import card_detection
+import card_export
+import card_pipeline
+import card_storage
+import card_thumbnails
+import ocr_tuning
+import contact_search
+import image_decode
+import image_quality
+import qr_fastpath
+from contact_import import import_contacts, detect_format
 
 st.set_page_config(page_title="OCR Visiting Card Reader", layout="wide")
 
@@ -23,6 +34,12 @@ if 'processed_data' not in st.session_state:
     st.session_state.processed_data = {}
 if 'delete_mode' not in st.session_state:
     st.session_state.delete_mode = False
+if 'gallery_open' not in st.session_state:
+    st.session_state.gallery_open = None
+if 'batch_results' not in st.session_state:
+    st.session_state.batch_results = []
+if 'batch_images' not in st.session_state:
+    st.session_state.batch_images = {}
 
 st.title("📇 Smart Visiting Card Reader")
 st.write("Upload or capture a visiting card to extract contact information automatically.")
@@ -90,303 +107,47 @@ if not st.session_state.setup_complete:
         st.markdown('</div>', unsafe_allow_html=True)
     st.stop()
 
-# ---------- IMAGE PREPROCESSING FUNCTION ----------
-def preprocess_image(image):
-    """Enhance image for better OCR results"""
-    try:
-        if image.mode != 'L':
-            image = image.convert('L')
-        enhancer = ImageEnhance.Contrast(image)
-        image = enhancer.enhance(2.0)
-        enhancer = ImageEnhance.Sharpness(image)
-        image = enhancer.enhance(2.0)
-        return image
-    except Exception as e:
-        return image
-
-# ---------- IMPROVED EXTRACTION FUNCTIONS ----------
-def extract_email(text):
-    """Extract email address from text"""
-    try:
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        matches = re.findall(email_pattern, text)
-        return matches[0] if matches else ""
-    except Exception as e:
-        return ""
+# ---------- BATCH PROCESSING ----------
+BATCH_WORKERS = ocr_tuning.tuned_workers()
+REVIEW_COLUMNS = ['Name', 'Email', 'Phone', 'Designation', 'Company', 'Website', 'Address']
+REVIEW_ORDER = ['Approve', 'File', 'Region', 'Status'] + REVIEW_COLUMNS
 
-def extract_website_from_email(email):
-    """Extract website from email - everything after @"""
-    if not email:
-        return ""
-    try:
-        website = email.split('@')[1]
-        return website
-    except:
-        return ""
-
-def extract_company_from_email(email):
-    """Extract company name from email - remove TLD"""
-    if not email:
-        return ""
-    try:
-        domain = email.split('@')[1]
-        company = re.sub(r'\.(com|net|org|in|co|us|uk|info|biz)$', '', domain)
-        company = company.replace('-', ' ').replace('_', ' ').title()
-        return company
-    except:
-        return ""
-
-def extract_phone_numbers(text):
-    """Extract phone numbers from text"""
-    try:
-        phone_patterns = [
-            r'[\+]?[9][1]?[-\s]?[6-9]\d{9}',
-            r'[6-9]\d{9}',
-            r'\+\d{1,3} \d{10}',
-            r'\d{5} \d{5}',
-            r'\d{3}[-.\s]?\d{3}[-.\s]?\d{4}',
-            r'\(\d{3}\)\s*\d{3}[-.\s]?\d{4}'
-        ]
-        
-        phones = []
-        for pattern in phone_patterns:
-            matches = re.findall(pattern, text)
-            for match in matches:
-                clean_phone = re.sub(r'[^\d\+]', '', match)
-                if len(clean_phone) >= 10 and clean_phone not in phones:
-                    phones.append(clean_phone)
-        
-        return phones[0] if phones else ""
-    except Exception as e:
-        return ""
+def process_upload(data, thresholds=None):
+    """Decode and OCR one uploaded image, which may be a scan of several cards.
 
-def extract_name(text_lines):
-    """Extract name from text lines"""
-    try:
-        # Look for name in first 3 lines
-        for i, line in enumerate(text_lines[:3]):
-            clean_line = line.strip()
-            if len(clean_line) < 2 or len(clean_line) > 50:
-                continue
-            # Skip lines with emails, websites, or phone numbers
-            if (re.search(r'@|www|\.com|\.net|\.org|\d{10}', clean_line.lower()) or
-                any(word in clean_line.lower() for word in ['company', 'ltd', 'inc', 'corp'])):
-                continue
-            
-            words = clean_line.split()
-            if 1 <= len(words) <= 4:
-                # Check for proper name capitalization
-                capital_words = sum(1 for word in words if word and word[0].isupper())
-                if capital_words >= len(words) * 0.7:
-                    return clean_line
-        
-        # Fallback: first line without obvious contact info
-        for line in text_lines[:5]:
-            clean_line = line.strip()
-            if (len(clean_line) >= 2 and 
-                not re.search(r'@|www|\.com|\.net|\d{10}', clean_line) and
-                len(clean_line.split()) <= 4):
-                return clean_line
-                
-        return ""
-    except Exception as e:
-        return ""
-
-def extract_designation(text_lines, extracted_name):
-    """Extract designation from text lines"""
-    try:
-        designation_keywords = [
-            'manager', 'director', 'engineer', 'developer', 'analyst', 'consultant', 
-            'specialist', 'executive', 'officer', 'president', 'ceo', 'cto', 'cfo', 
-            'vp', 'head', 'lead', 'senior', 'junior', 'associate', 'assistant',
-            'architect', 'designer', 'coordinator', 'administrator', 'supervisor',
-            'chief', 'partner', 'founder', 'owner', 'principal', 'neurologist', 
-            'doctor', 'physician', 'surgeon', 'sales', 'marketing', 'hr', 'finance'
-        ]
-        
-        # Find name position
-        name_index = -1
-        for i, line in enumerate(text_lines):
-            if line.strip() == extracted_name:
-                name_index = i
-                break
-        
-        # Check line after name (most common)
-        if name_index != -1 and name_index + 1 < len(text_lines):
-            next_line = text_lines[name_index + 1].strip()
-            if (2 <= len(next_line) <= 60 and 
-                not re.search(r'@|www|\.com|\.net|\d{10}', next_line.lower()) and
-                any(keyword in next_line.lower() for keyword in designation_keywords)):
-                return next_line
-        
-        # Check line before name
-        if name_index > 0:
-            prev_line = text_lines[name_index - 1].strip()
-            if (2 <= len(prev_line) <= 60 and 
-                not re.search(r'@|www|\.com|\.net|\d{10}', prev_line.lower()) and
-                any(keyword in prev_line.lower() for keyword in designation_keywords)):
-                return prev_line
-        
-        # Search all lines for designation keywords
-        for line in text_lines:
-            clean_line = line.strip()
-            if (clean_line != extracted_name and
-                2 <= len(clean_line) <= 60 and
-                any(keyword in clean_line.lower() for keyword in designation_keywords)):
-                if not (re.search(r'@|www|\.com|\.net', clean_line.lower()) or 
-                       re.search(r'\d{10}', clean_line)):
-                    return clean_line
-        
-        return ""
-    except Exception as e:
-        return ""
-
-def extract_company_name(text_lines, extracted_email):
-    """Extract company name from text"""
-    try:
-        # First priority: company from email domain
-        company_from_email = extract_company_from_email(extracted_email)
-        if company_from_email:
-            return company_from_email
-        
-        # Look for company name in prominent positions
-        company_keywords = [
-            'ltd', 'inc', 'corporation', 'company', 'corp', 'private', 'limited', 
-            'tech', 'solutions', 'enterprises', 'group', 'industries', 'systems', 
-            'technologies', 'international', 'global', 'holdings', 'ventures'
-        ]
-        
-        # Check lines that look like company names
-        for line in text_lines:
-            clean_line = line.strip()
-            if (3 <= len(clean_line) <= 60 and
-                not re.search(r'@|www|\.com|\.net|\d{10}', clean_line.lower())):
-                
-                # Check for company keywords
-                if any(keyword in clean_line.lower() for keyword in company_keywords):
-                    return clean_line
-                
-                # Check for multi-word capitalized names
-                words = clean_line.split()
-                if len(words) >= 2:
-                    capital_words = sum(1 for word in words if word and word[0].isupper())
-                    if capital_words >= len(words) * 0.6:
-                        return clean_line
-        
-        return ""
-    except Exception as e:
-        return ""
-
-def extract_address(text):
-    """Extract company address from text - IMPROVED"""
-    try:
-        lines = text.split('\n')
-        address_lines = []
-        
-        # More comprehensive address detection
-        for i, line in enumerate(lines):
-            clean_line = line.strip()
-            if len(clean_line) < 5 or len(clean_line) > 100:
-                continue
-                
-            # Address indicators
-            has_number = bool(re.search(r'\d+', clean_line))
-            has_street = bool(re.search(r'street|st|road|rd|avenue|ave|boulevard|blvd|lane|ln|drive|dr', clean_line.lower()))
-            has_building = bool(re.search(r'apartment|apt|flat|building|bldg|block|sector|phase|floor|fl|suite|ste', clean_line.lower()))
-            has_city = bool(re.search(r'\b(mumbai|delhi|bangalore|bengaluru|chennai|kolkata|hyderabad|pune|ahmedabad|surat|jaipur|zirakpur|mohali|chandigarh|gurgaon|noida)\b', clean_line.lower()))
-            has_pincode = bool(re.search(r'\b\d{6}\b', clean_line))
-            has_area = bool(re.search(r'nagar|colony|area|locality|sector|district|state', clean_line.lower()))
-            
-            # Calculate address score
-            address_score = sum([has_number, has_street, has_building, has_city, has_pincode, has_area])
-            
-            # Strong indicators
-            if has_pincode and has_number:
-                address_lines.append(clean_line)
-            elif address_score >= 3:
-                address_lines.append(clean_line)
-            elif has_number and (has_street or has_building):
-                address_lines.append(clean_line)
-        
-        # Also look for consecutive address lines
-        if len(address_lines) < 2:
-            for i in range(len(lines) - 2):
-                block_lines = lines[i:i+3]
-                block_text = ' '.join(block_lines)
-                
-                block_score = 0
-                if re.search(r'\d+', block_text):
-                    block_score += 1
-                if re.search(r'street|st|road|rd|avenue|ave', block_text.lower()):
-                    block_score += 1
-                if re.search(r'\b\d{6}\b', block_text):
-                    block_score += 1
-                if re.search(r'apartment|building|block|sector', block_text.lower()):
-                    block_score += 1
-                
-                if block_score >= 3:
-                    address_lines = [line.strip() for line in block_lines if line.strip()]
-                    break
-        
-        # Clean and format address
-        if address_lines:
-            # Remove non-address lines
-            filtered_address = []
-            for line in address_lines:
-                if not re.search(r'@|http|www|\.com|\.net|gmail|yahoo', line.lower()):
-                    filtered_address.append(line)
-            
-            if filtered_address:
-                # Join with proper formatting
-                address = ', '.join(filtered_address)
-                return address
-        
-        return ""
-    except Exception as e:
-        return ""
+    Returns a list of (region, fields, status); runs on a worker thread, so no st.* calls here.
+    """
+    image = image_decode.decode_image(io.BytesIO(data), image_decode.PAGE_SIZE)
+    regions = card_pipeline.find_cards(image)
+    if len(regions) < 2 and thresholds is not None:
+        quality = image_quality.assess_quality(image, thresholds)
+        if not quality['ok']:
+            return [(None, {}, "Low quality: " + "; ".join(quality['issues']))]
+    results = []
+    for region, text, fields in card_pipeline.process_page(image, regions=regions):
+        if not fields:
+            results.append((region, {}, "No text found"))
+        else:
+            results.append((region, fields, "QR code" if not text else "OCR"))
+    return results
 
-def extract_all_fields(text):
-    """Extract all fields from OCR text - IMPROVED"""
-    try:
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
-        
-        # Extract basic contact info first
-        email = extract_email(text)
-        phone = extract_phone_numbers(text)
-        website = extract_website_from_email(email)
-        
-        # Extract name
-        name = extract_name(lines)
-        
-        # Extract other fields using name as reference
-        designation = extract_designation(lines, name)
-        company = extract_company_name(lines, email)
-        address = extract_address(text)
-        
-        return {
-            'name': name or "",
-            'email': email or "",
-            'phone': phone or "",
-            'website': website or "",
-            'company': company or "",
-            'designation': designation or "",
-            'address': address or ""
-        }
-    except Exception as e:
-        return {
-            'name': "", 'email': "", 'phone': "", 'website': "", 
-            'company': "", 'designation': "", 'address': ""
-        }
+def describe_ocr_stats(stats):
+    """One-line summary of the orientation/script pre-pass"""
+    details = [f"languages {stats['lang'] or 'default'}"]
+    if stats['script']:
+        details.insert(0, f"{stats['script']} script")
+    if stats['rotate']:
+        details.insert(0, f"rotated {stats['rotate']}°")
+    summary = (f"Orientation/script check {1000 * stats['seconds']:.0f} ms ({', '.join(details)}), "
+               f"OCR {1000 * stats['ocr_seconds']:.0f} ms, field re-check {1000 * stats['refine_seconds']:.0f} ms")
+    if stats['refined']:
+        summary += f" (corrected {', '.join(stats['refined'])})"
+    return summary
 
 # ---------- DATABASE FUNCTIONS ----------
 def load_database():
     """Load the database CSV"""
-    if os.path.exists(st.session_state.csv_path):
-        try:
-            return pd.read_csv(st.session_state.csv_path)
-        except:
-            return pd.DataFrame()
-    return pd.DataFrame()
+    return card_storage.load_database(st.session_state.csv_path)
 
 def save_to_database(data):
     """Save data to CSV database"""
@@ -394,28 +155,16 @@ def save_to_database(data):
         # Remove Raw_Text from data
         data_to_save = {k: v for k, v in data.items() if k != 'Raw_Text'}
         
-        df_row = pd.DataFrame([data_to_save])
-        
-        existing_df = load_database()
-        if not existing_df.empty:
-            updated_df = pd.concat([existing_df, df_row], ignore_index=True)
-        else:
-            updated_df = df_row
-        
-        updated_df.to_csv(st.session_state.csv_path, index=False)
+        card_storage.append_records(st.session_state.csv_path, [data_to_save])
         return True
     except Exception as e:
         st.error(f"Error saving to database: {e}")
         return False
 
-def delete_from_database(index):
+def delete_from_database(record_id):
     """Delete record from database"""
     try:
-        df = load_database()
-        if not df.empty and 0 <= index < len(df):
-            df = df.drop(index).reset_index(drop=True)
-            df.to_csv(st.session_state.csv_path, index=False)
-            return True
+        return card_storage.delete_records(st.session_state.csv_path, [record_id]) > 0
     except Exception as e:
         st.error(f"Error deleting record: {e}")
     return False
@@ -436,17 +185,48 @@ if not df.empty:
 else:
     st.sidebar.info("**Cards in database:** 0")
 
+cache = card_storage.cache_stats()
+st.sidebar.caption(f"Read cache: {cache['hit_rate']:.0%} hits, {cache['memory_bytes'] / 1e6:.1f} MB")
+
+# Bulk import of external contact lists
+with st.sidebar.expander("📥 Import Contacts"):
+    import_file = st.file_uploader("CSV or vCard export", type=["csv", "vcf"], key="import_file")
+    if import_file and st.button("Import", use_container_width=True):
+        progress_text = st.empty()
+        try:
+            stats = import_contacts(
+                import_file, st.session_state.csv_path, detect_format(import_file.name),
+                progress=lambda rows, rate: progress_text.write(f"{rows} rows read ({rate:,.0f} rows/s)"))
+            st.success(f"✅ Imported {stats['imported']} contacts "
+                       f"({stats['duplicates']} duplicates skipped, {stats['rows_per_second']:,.0f} rows/s)")
+        except Exception as e:
+            st.error(f"Error importing contacts: {e}")
+
+# Pre-OCR quality gate settings
+with st.sidebar.expander("🔎 Quality Check"):
+    quality_check = st.checkbox("Check image quality before OCR", value=True)
+    quality_thresholds = {
+        'min_sharpness': st.slider("Minimum sharpness", 0.0, 500.0,
+                                   image_quality.DEFAULT_THRESHOLDS['min_sharpness']),
+        'max_glare': st.slider("Maximum glare fraction", 0.0, 1.0,
+                               image_quality.DEFAULT_THRESHOLDS['max_glare']),
+        'min_text_density': st.slider("Minimum text density", 0.0, 0.2,
+                                      image_quality.DEFAULT_THRESHOLDS['min_text_density'], step=0.005),
+    }
+
 # ---------- CARD PROCESSING INTERFACE ----------
 st.header("🎯 Process Visiting Card")
 
-option = st.radio("Choose input method:", ["Upload Image", "Use Camera"], horizontal=True)
+option = st.radio("Choose input method:", ["Upload Image", "Use Camera", "Multiple Cards"], horizontal=True)
 image = None
+source = None  # the uploaded file; its original bytes are what gets saved
 
 if option == "Upload Image":
     uploaded = st.file_uploader("Choose visiting card image", type=["jpg", "jpeg", "png"])
     if uploaded:
         try:
-            image = Image.open(uploaded)
+            image = image_decode.decode_image(uploaded)
+            source = uploaded
             st.image(image, caption="Uploaded Card", use_column_width=True)
         except Exception as e:
             st.error(f"Error loading image: {e}")
@@ -455,27 +235,140 @@ elif option == "Use Camera":
     camera_input = st.camera_input("Take a picture of the visiting card")
     if camera_input:
         try:
-            image = Image.open(camera_input)
+            image = image_decode.decode_image(camera_input)
+            source = camera_input
             st.image(image, caption="Captured Card", use_column_width=True)
         except Exception as e:
             st.error(f"Error loading image: {e}")
 
+elif option == "Multiple Cards":
+    uploaded_files = st.file_uploader("Choose card photos or scanned pages of cards", type=["jpg", "jpeg", "png"],
+                                      accept_multiple_files=True)
+    if card_detection.cv2 is None:
+        st.warning("Card segmentation is unavailable because OpenCV is not installed, "
+                   "so each image is processed as a single card.")
+    if uploaded_files and st.button(f"🔍 Extract Cards from {len(uploaded_files)} Images", type="primary",
+                                    use_container_width=True):
+        # Reading the uploads here keeps the worker threads free of Streamlit objects
+        uploads = [(f.name, f.getvalue()) for f in uploaded_files]
+        thresholds = quality_thresholds if quality_check else None
+        progress = st.progress(0.0, text=f"Processing {len(uploads)} images...")
+        live_table = st.empty()
+        results = [None] * len(uploads)
+
+        with ThreadPoolExecutor(max_workers=BATCH_WORKERS) as executor:
+            futures = {executor.submit(process_upload, data, thresholds): i
+                       for i, (name, data) in enumerate(uploads)}
+            for done, future in enumerate(as_completed(futures), 1):
+                i = futures[future]
+                try:
+                    cards = future.result()
+                except Exception as e:
+                    cards = [(None, {}, f"Error: {e}")]
+                results[i] = []
+                for region, fields, status in cards:
+                    row = {'Approve': bool(fields), 'File': uploads[i][0],
+                           'Region': card_pipeline.format_region(region), 'Status': status, 'Upload': i}
+                    row.update({column: fields.get(column.lower(), '') for column in REVIEW_COLUMNS})
+                    results[i].append(row)
+                progress.progress(done / len(uploads), text=f"Processed {done} of {len(uploads)} images")
+                live_table.dataframe(pd.DataFrame([r for rows in results if rows for r in rows]),
+                                     column_order=REVIEW_ORDER, use_container_width=True, hide_index=True)
+
+        live_table.empty()
+        st.session_state.batch_results = [row for rows in results for row in rows]
+        st.session_state.batch_images = {i: data for i, (name, data) in enumerate(uploads)}
+        st.session_state.processed_data = {}
+
+if option == "Multiple Cards" and st.session_state.batch_results:
+    st.header("📋 Review Extracted Cards")
+    st.caption("Correct any field in the table and untick the cards you don't want to keep.")
+    reviewed = st.data_editor(
+        pd.DataFrame(st.session_state.batch_results),
+        column_config={'Approve': st.column_config.CheckboxColumn("Approve", default=True)},
+        column_order=REVIEW_ORDER,
+        disabled=['File', 'Region', 'Status'],
+        use_container_width=True,
+        hide_index=True,
+        key="batch_review",
+    )
+    approved = reviewed[reviewed['Approve']]
+
+    col_b1, col_b2 = st.columns(2)
+    with col_b1:
+        save_batch = st.button(f"💾 Save {len(approved)} Approved Cards", type="primary",
+                               use_container_width=True, disabled=approved.empty)
+    with col_b2:
+        if st.button("🗑️ Discard Batch", use_container_width=True):
+            st.session_state.batch_results = []
+            st.session_state.batch_images = {}
+            st.rerun()
+
+    if save_batch:
+        try:
+            img_files = [f for f in os.listdir(st.session_state.image_folder) if f.startswith('card_')]
+            next_number = len(img_files) + 1
+            records = []
+            saved_images = {}
+            for _, row in approved.iterrows():
+                upload = row['Upload']
+                if upload not in saved_images:
+                    # The upload is stored as-is, once per page; re-encoding a camera JPEG as PNG only makes it bigger
+                    extension = os.path.splitext(row['File'])[1].lower() or '.png'
+                    img_full_path = os.path.join(st.session_state.image_folder, f"card_{next_number}{extension}")
+                    with open(img_full_path, "wb") as f:
+                        f.write(st.session_state.batch_images[upload])
+                    saved_images[upload] = img_full_path
+                    next_number += 1
+                # Same schema as the watch-folder path, from the corrected table cells
+                fields = {column.lower(): row[column] or '' for column in REVIEW_COLUMNS}
+                region = tuple(int(v) for v in row['Region'].split(',')) if row['Region'] else None
+                records.append(card_pipeline.contact_record(fields, saved_images[upload], row['File'], region))
+
+            # One locked append for the whole batch instead of one write per card
+            card_storage.append_records(st.session_state.csv_path, records)
+            st.session_state.batch_results = []
+            st.session_state.batch_images = {}
+            st.success(f"✅ Saved {len(records)} contacts!")
+            st.rerun()
+        except Exception as e:
+            st.error(f"❌ Error saving cards: {str(e)}")
+
 # Process the image
 if image is not None:
     if st.button("🔍 Extract Information", type="primary", use_container_width=True):
         with st.spinner("Processing card... This may take a few seconds"):
             try:
-                processed_image = preprocess_image(image)
-                custom_config = r'--oem 3 --psm 6'
-                extracted_text = pytesseract.image_to_string(processed_image, config=custom_config)
+                # A vCard/MeCard QR code is exact and much faster than OCR
+                qr_fields = qr_fastpath.read_qr_fields(image)
+                if qr_fastpath.is_complete(qr_fields):
+                    st.session_state.processed_data = qr_fastpath.fill_derived(qr_fields)
+                    st.success("✅ Information read from the card's QR code!")
+                else:
+                    if quality_check:
+                        quality = image_quality.assess_quality(image, quality_thresholds)
+                        if not quality['ok']:
+                            st.error("❌ This picture is unlikely to give good results:\n\n- " +
+                                     "\n- ".join(quality['issues']))
+                            st.caption("Retake the picture, or turn off the quality check in the sidebar to process it anyway.")
+                            st.stop()
                 
-                if not extracted_text.strip():
-                    st.error("❌ No text found in the image. Please try with a clearer picture.")
-                    st.stop()
+                    # Orientation and script come from a quick OSD pass on a thumbnail
+                    ocr_stats = {}
+                    extracted_text = card_pipeline.ocr_image(image, ocr_stats)
+                    st.caption(describe_ocr_stats(ocr_stats))
+                
+                    if not extracted_text.strip() and not qr_fields:
+                        st.error("❌ No text found in the image. Please try with a clearer picture.")
+                        st.stop()
                 
-                extracted_data = extract_all_fields(extracted_text)
-                st.session_state.processed_data = extracted_data
-                st.success("✅ Information extracted successfully!")
+                    extracted_data = extract_all_fields(extracted_text)
+                    if qr_fields:
+                        extracted_data, corrected = qr_fastpath.merge_fields(qr_fields, extracted_data)
+                        if corrected:
+                            st.info(f"ℹ️ Corrected from QR code: {', '.join(corrected)}")
+                    st.session_state.processed_data = extracted_data
+                    st.success("✅ Information extracted successfully!")
                 
             except Exception as e:
                 st.error(f"❌ Error processing image: {str(e)}")
@@ -502,15 +395,13 @@ if st.session_state.processed_data:
     
     if st.button("💾 Save to Database", type="primary", use_container_width=True):
         try:
-            # Save image
+            # Save the upload as-is, like batch mode; `image` is only the downscaled working copy
             img_files = [f for f in os.listdir(st.session_state.image_folder) if f.startswith('card_')]
             next_number = len(img_files) + 1
-            img_filename = f"card_{next_number}.png"
+            extension = os.path.splitext(source.name)[1].lower() or '.png'
+            img_filename = f"card_{next_number}{extension}"
             img_full_path = os.path.join(st.session_state.image_folder, img_filename)
-            
-            img_buffer = io.BytesIO()
-            image.save(img_buffer, format="PNG")
-            img_bytes = img_buffer.getvalue()
+            img_bytes = source.getvalue()
             
             with open(img_full_path, "wb") as f:
                 f.write(img_bytes)
@@ -554,7 +445,8 @@ END:VCARD"""
                     st.download_button("📇 Download vCard", vcard, "contact.vcf", "text/vcard")
                 
                 with col_d3:
-                    st.download_button("🖼️ Download Image", img_bytes, f"card_{next_number}.png", "image/png")
+                    st.download_button("🖼️ Download Image", img_bytes, img_filename,
+                                       source.type or "application/octet-stream")
                 
                 # Clear processed data
                 st.session_state.processed_data = {}
@@ -582,11 +474,23 @@ if not df.empty:
     # Display dataframe without Image_Path
     display_columns = ['Name', 'Designation', 'Email', 'Phone', 'Company', 'Website', 'Address']
     
+    # Search through the inverted index instead of scanning the table
+    search_query = st.text_input("🔍 Search contacts",
+                                 placeholder="e.g. acme pune, or company:acme title:vp city:pune")
+    view_df = df
+    if search_query.strip():
+        try:
+            matching_ids = contact_search.search_contacts(st.session_state.csv_path, search_query)
+            view_df = df[df['Id'].isin(matching_ids)]
+            st.caption(f"{len(view_df)} of {len(df)} contacts match")
+        except Exception as e:
+            st.error(f"Error searching contacts: {e}")
+    
     if st.session_state.delete_mode:
         st.warning("🗑️ **Delete Mode Active** - Click on records to delete them")
         
         # Create a selectable dataframe for deletion
-        for i, row in df.iterrows():
+        for i, row in view_df.iterrows():
             with st.container():
                 col_a, col_b = st.columns([5, 1])
                 with col_a:
@@ -598,17 +502,49 @@ if not df.empty:
                     st.markdown("---")
                 
                 with col_b:
-                    if st.button("Delete", key=f"delete_{i}"):
-                        if delete_from_database(i):
+                    if st.button("Delete", key=f"delete_{row['Id']}"):
+                        if delete_from_database(row['Id']):
                             st.success(f"✅ Record deleted successfully!")
                             st.rerun()
                         else:
                             st.error("❌ Failed to delete record")
     else:
         # Normal display mode
-        display_df = df[display_columns].copy()
+        display_df = view_df[display_columns].copy()
         st.dataframe(display_df, use_container_width=True)
     
+    # Gallery of saved cards: small cached thumbnails, one page at a time
+    with st.expander("🖼️ Card Gallery"):
+        gallery_df = view_df[view_df['Image_Path'].notna() & (view_df['Image_Path'] != '')]
+        if gallery_df.empty:
+            st.info("No saved card images yet.")
+        else:
+            page_size = 12
+            pages = (len(gallery_df) - 1) // page_size + 1
+            page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1)
+            thumb_dir = os.path.join(st.session_state.image_folder, card_thumbnails.THUMBNAIL_DIR)
+            
+            page_df = gallery_df.iloc[(page - 1) * page_size:page * page_size]
+            gallery_cols = st.columns(4)
+            for n, (_, row) in enumerate(page_df.iterrows()):
+                with gallery_cols[n % 4]:
+                    thumb = card_thumbnails.get_thumbnail(row['Image_Path'], thumb_dir)
+                    if thumb:
+                        st.image(thumb, caption=row['Name'] if pd.notna(row['Name']) else "")
+                    else:
+                        st.caption(f"🚫 Image missing: {row['Name']}")
+                    if thumb and st.button("Open", key=f"open_{row['Id']}"):
+                        st.session_state.gallery_open = row['Id']
+            
+            # Only the opened card is loaded at full resolution
+            opened = gallery_df[gallery_df['Id'] == st.session_state.gallery_open]
+            if not opened.empty:
+                card = opened.iloc[0]
+                st.image(card['Image_Path'], caption=card['Name'], use_column_width=True)
+                if st.button("Close", key="gallery_close"):
+                    st.session_state.gallery_open = None
+                    st.rerun()
+    
     # Statistics
     st.subheader("📊 Database Statistics")
     total = len(df)
@@ -628,9 +564,24 @@ if not df.empty:
     col_s6.metric("With Website", with_website)
     col_s7.metric("With Address", with_address)
     
-    # Export option
-    st.download_button("💾 Export Full Database", df.to_csv(index=False).encode('utf-8'), 
-                     "visiting_cards_complete.csv", "text/csv")
+    # Export options
+    col_e1, col_e2 = st.columns(2)
+    with col_e1:
+        st.download_button("💾 Export Full Database", df.to_csv(index=False).encode('utf-8'), 
+                         "visiting_cards_complete.csv", "text/csv")
+    with col_e2:
+        # Columnar snapshot for analytics tools, written from storage in row groups
+        if not card_export.available():
+            st.caption("Parquet export needs pyarrow: `pip install -r requirements_export.txt`")
+        elif st.button("📦 Prepare Parquet Export"):
+            try:
+                parquet_path = os.path.join(st.session_state.save_path, "visiting_cards_complete.parquet")
+                card_export.export_database(st.session_state.csv_path, parquet_path)
+                with open(parquet_path, "rb") as f:
+                    st.download_button("📦 Download Parquet", f.read(), "visiting_cards_complete.parquet",
+                                       "application/vnd.apache.parquet")
+            except Exception as e:
+                st.error(f"Error exporting Parquet: {e}")
     
 else:
     st.info("No contacts saved yet. Process your first visiting card above!")
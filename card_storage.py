@@ -0,0 +1,337 @@
+import argparse
+import contextlib
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import uuid
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+# Column order of the contact CSV database
+CONTACT_COLUMNS = ['Id', 'Name', 'Email', 'Phone', 'Designation', 'Company', 'Website', 'Address', 'Image_Path']
+
+# Callbacks run under the write lock after every change (see add_write_listener)
+_write_listeners = []
+
+# Parsed tables shared by every session in this process, keyed by absolute path
+_read_cache = {}
+_read_cache_lock = threading.Lock()
+_cache_counters = {'hits': 0, 'misses': 0, 'updates': 0}
+
+
+# ---------- LOCKING ----------
+@contextlib.contextmanager
+def database_lock(csv_path, shared=False):
+    """Hold a process-wide lock on the database while reading or writing it"""
+    with open(csv_path + '.lock', 'a+b') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        else:
+            # msvcrt has no shared locks; it also gives up after ~10s, so keep retrying
+            lock_file.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def file_signature(csv_path):
+    """(mtime_ns, size) of the database file, or None if it does not exist"""
+    try:
+        stat = os.stat(csv_path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def add_write_listener(listener):
+    """Register listener(csv_path, added_df, removed_ids, before, after) for database changes"""
+    # Listeners run while the write lock is held, so they see changes in commit
+    # order; before/after are file signatures. A call with neither added rows
+    # nor removed ids means the whole file was rewritten (e.g. id migration).
+    if listener not in _write_listeners:
+        _write_listeners.append(listener)
+
+
+def _notify(csv_path, added_df, removed_ids, before):
+    after = file_signature(csv_path)
+    _update_cache(csv_path, added_df, removed_ids, before, after)
+    for listener in _write_listeners:
+        try:
+            listener(csv_path, added_df, removed_ids, before, after)
+        except Exception:
+            # The write itself succeeded; a failed listener (e.g. a search index) is now stale
+            logger.exception("Write listener %r failed for %s", listener, csv_path)
+
+
+def new_record_id():
+    """Stable identifier for a contact, independent of its row position"""
+    return uuid.uuid4().hex
+
+
+def _assign_ids(df):
+    """Give every row without an Id a fresh one"""
+    if 'Id' not in df.columns:
+        df.insert(0, 'Id', '')
+    missing = df['Id'].isna() | (df['Id'].astype(str) == '')
+    if missing.any():
+        df.loc[missing, 'Id'] = [new_record_id() for _ in range(int(missing.sum()))]
+    return df
+
+
+def _write_atomic(csv_path, df):
+    """Replace the database file in one rename so readers never see a partial file"""
+    directory = os.path.dirname(os.path.abspath(csv_path))
+    tmp_path = os.path.join(directory, f".cards_{uuid.uuid4().hex}.csv")
+    # New databases get the usual 0o666 & ~umask; an existing one keeps its permissions
+    fd = os.open(tmp_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666)
+    try:
+        with os.fdopen(fd, 'w', newline='', encoding='utf-8') as f:
+            if os.path.exists(csv_path):
+                os.chmod(tmp_path, os.stat(csv_path).st_mode & 0o777)
+            df.to_csv(f, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, csv_path)
+    except:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+# ---------- READ FUNCTIONS ----------
+def _read_csv(csv_path):
+    # Everything is text: keeps leading zeros and '+' in phone numbers, '' for empty fields
+    if os.path.exists(csv_path) and os.path.getsize(csv_path) > 0:
+        return pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+    return pd.DataFrame()
+
+
+def load_database(csv_path):
+    """Load the database CSV (cached; treat the returned frame as read-only)"""
+    if csv_path and os.path.exists(csv_path):
+        try:
+            key = os.path.abspath(csv_path)
+            with _read_cache_lock:
+                entry = _read_cache.get(key)
+                if entry is not None and entry['signature'] == file_signature(csv_path):
+                    _cache_counters['hits'] += 1
+                    return entry['df']
+                _cache_counters['misses'] += 1
+
+            with database_lock(csv_path, shared=True):
+                signature = file_signature(csv_path)
+                df = _read_csv(csv_path)
+            if not df.empty and 'Id' not in df.columns:
+                df = ensure_ids(csv_path)
+                signature = file_signature(csv_path)
+            with _read_cache_lock:
+                _read_cache[key] = {'signature': signature, 'df': df}
+            return df
+        except:
+            return pd.DataFrame()
+    return pd.DataFrame()
+
+
+def _update_cache(csv_path, added_df, removed_ids, before, after):
+    """Apply a committed write to the cached table instead of re-reading the file"""
+    key = os.path.abspath(csv_path)
+    with _read_cache_lock:
+        entry = _read_cache.get(key)
+        if entry is None:
+            return
+        df = entry['df']
+        if entry['signature'] != before or (added_df is None and not removed_ids):
+            del _read_cache[key]
+            return
+        if added_df is not None:
+            if df.empty or any(c not in df.columns for c in added_df.columns):
+                del _read_cache[key]
+                return
+            added = added_df.reindex(columns=df.columns).fillna('').astype(str)
+            df = pd.concat([df, added], ignore_index=True)
+        if removed_ids:
+            df = df[~df['Id'].isin(set(removed_ids))].reset_index(drop=True)
+        _read_cache[key] = {'signature': after, 'df': df}
+        _cache_counters['updates'] += 1
+
+
+def cache_stats():
+    """Hit rate and memory use of the read cache"""
+    with _read_cache_lock:
+        lookups = _cache_counters['hits'] + _cache_counters['misses']
+        return dict(_cache_counters,
+                    entries=len(_read_cache),
+                    hit_rate=_cache_counters['hits'] / lookups if lookups else 0.0,
+                    memory_bytes=int(sum(e['df'].memory_usage(deep=True).sum() for e in _read_cache.values())))
+
+
+def read_header(csv_path):
+    """Return the column names of the database CSV, or [] if it has none"""
+    if not csv_path or not os.path.exists(csv_path) or os.path.getsize(csv_path) == 0:
+        return []
+    try:
+        return list(pd.read_csv(csv_path, nrows=0).columns)
+    except:
+        return []
+
+
+def iter_database_chunks(csv_path, chunksize=10000, usecols=None, lock=True):
+    """Yield the database in DataFrame chunks so large files stay bounded in memory"""
+    if not csv_path or not os.path.exists(csv_path):
+        return
+    with database_lock(csv_path, shared=True) if lock else contextlib.nullcontext():
+        header = read_header(csv_path)
+        if not header:
+            return
+        if usecols is not None:
+            usecols = [c for c in usecols if c in header]
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize, usecols=usecols,
+                                 dtype=str, keep_default_na=False):
+            yield chunk
+
+
+# ---------- WRITE FUNCTIONS ----------
+def ensure_ids(csv_path):
+    """Migrate a database written before record ids existed"""
+    with database_lock(csv_path):
+        df = _read_csv(csv_path)
+        if not df.empty and ('Id' not in df.columns or (df['Id'] == '').any()):
+            before = file_signature(csv_path)
+            df = _assign_ids(df)
+            _write_atomic(csv_path, df)
+            _notify(csv_path, None, [], before)
+        return df
+
+
+def append_records(csv_path, records):
+    """Append records to the database CSV without rewriting existing rows"""
+    if isinstance(records, pd.DataFrame):
+        new_df = records.copy()
+    else:
+        new_df = pd.DataFrame(list(records))
+    if new_df.empty:
+        return 0
+    new_df = _assign_ids(new_df)
+
+    with database_lock(csv_path):
+        before = file_signature(csv_path)
+        header = read_header(csv_path)
+        if not header:
+            columns = CONTACT_COLUMNS + [c for c in new_df.columns if c not in CONTACT_COLUMNS]
+            _write_atomic(csv_path, new_df.reindex(columns=columns))
+        elif 'Id' in header and all(c in header for c in new_df.columns):
+            # Same schema: plain append keeps the cost proportional to the batch
+            with open(csv_path, 'a', newline='', encoding='utf-8') as f:
+                new_df.reindex(columns=header).to_csv(f, header=False, index=False)
+                f.flush()
+                os.fsync(f.fileno())
+        else:
+            # Schema changed: rewrite once with the union of both schemas
+            existing_df = _assign_ids(_read_csv(csv_path))
+            columns = list(existing_df.columns) + [c for c in new_df.columns if c not in existing_df.columns]
+            _write_atomic(csv_path, pd.concat([existing_df, new_df], ignore_index=True).reindex(columns=columns))
+        _notify(csv_path, new_df, [], before)
+    return len(new_df)
+
+
+def delete_records(csv_path, record_ids):
+    """Delete records by Id; returns how many rows were removed"""
+    record_ids = {str(i) for i in record_ids}
+    with database_lock(csv_path):
+        df = _read_csv(csv_path)
+        if df.empty or 'Id' not in df.columns:
+            return 0
+        keep = ~df['Id'].astype(str).isin(record_ids)
+        removed = int((~keep).sum())
+        if removed:
+            before = file_signature(csv_path)
+            _write_atomic(csv_path, df[keep])
+            _notify(csv_path, None, list(df.loc[~keep, 'Id'].astype(str)), before)
+        return removed
+
+
+# ---------- STRESS TEST ----------
+def _stress_writer(csv_path, writer, records, delete_every):
+    """Append records one at a time, deleting a few of our own as we go"""
+    deleted = []
+    for n in range(records):
+        record = {'Id': new_record_id(), 'Name': f"Writer {writer} Card {n}",
+                  'Email': f"w{writer}.c{n}@example.com"}
+        append_records(csv_path, [record])
+        if delete_every and n % delete_every == delete_every - 1:
+            delete_records(csv_path, [record['Id']])
+            deleted.append(record['Id'])
+    return deleted
+
+
+def stress_test(csv_path=None, writers=8, records=100, delete_every=10):
+    """Run concurrent writer processes against a new database and check nothing is lost.
+
+    csv_path must not exist yet; by default the database goes in a fresh temporary directory.
+    """
+    if csv_path is None:
+        csv_path = os.path.join(tempfile.mkdtemp(prefix='cards_stress_'), 'cards.csv')
+    elif os.path.exists(csv_path):
+        raise FileExistsError(f"Refusing to stress-test an existing database: {csv_path}")
+    start = time.perf_counter()
+    with multiprocessing.Pool(writers) as pool:
+        results = pool.starmap(_stress_writer, [(csv_path, w, records, delete_every) for w in range(writers)])
+    seconds = time.perf_counter() - start
+
+    deleted_ids = {i for r in results for i in r}
+    df = load_database(csv_path)
+    expected = writers * records - len(deleted_ids)
+    operations = writers * records + len(deleted_ids)
+    return {
+        'db': csv_path,
+        'expected': expected,
+        'found': len(df),
+        'unique_ids': int(df['Id'].nunique()) if not df.empty else 0,
+        'lost': expected - len(df),
+        'undeleted': int(df['Id'].isin(deleted_ids).sum()) if not df.empty else 0,
+        'seconds': seconds,
+        'operations_per_second': operations / seconds if seconds > 0 else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stress-test concurrent writes to the card database")
+    parser.add_argument('--db', help="New database file to create (default: in a fresh temporary directory)")
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--records', type=int, default=100, help="Records appended per writer")
+    parser.add_argument('--delete-every', type=int, default=10, help="Each writer deletes every Nth own record")
+    args = parser.parse_args()
+
+    try:
+        result = stress_test(args.db, args.writers, args.records, args.delete_every)
+    except FileExistsError as e:
+        parser.error(str(e))
+    print(f"{result['found']}/{result['expected']} records present, {result['unique_ids']} unique ids, "
+          f"{result['lost']} lost, {result['undeleted']} not deleted, {result['operations_per_second']:,.0f} writes/s")
+    if result['lost'] or result['undeleted'] or result['unique_ids'] != result['found']:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+import hashlib
+import os
+import threading
+from PIL import Image, ImageOps
+
+THUMBNAIL_SIZE = (320, 200)
+THUMBNAIL_DIR = '.thumbnails'
+
+
+def thumbnail_path(image_path, cache_dir):
+    """Cache location of the thumbnail for a saved card image"""
+    key = hashlib.sha1(os.path.abspath(image_path).encode('utf-8')).hexdigest()[:20]
+    return os.path.join(cache_dir, key + '.jpg')
+
+
+def get_thumbnail(image_path, cache_dir, size=THUMBNAIL_SIZE):
+    """Return the path of an up-to-date thumbnail, creating it on first use"""
+    if not isinstance(image_path, str) or not os.path.exists(image_path):
+        return None
+    thumb_path = thumbnail_path(image_path, cache_dir)
+    try:
+        # A thumbnail older than its source is stale
+        if os.path.getmtime(thumb_path) >= os.path.getmtime(image_path):
+            return thumb_path
+    except OSError:
+        pass
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with Image.open(image_path) as image:
+            image.draft('RGB', size)
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail(size)
+            if image.mode != 'RGB':
+                image = image.convert('RGB')
+            tmp_path = f"{thumb_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            image.save(tmp_path, format='JPEG', quality=80)
+        os.replace(tmp_path, thumb_path)
+        return thumb_path
+    except Exception as e:
+        return None
@@ -0,0 +1,164 @@
+import argparse
+import os
+import re
+import time
+import pandas as pd
+
+from card_storage import CONTACT_COLUMNS, append_records, iter_database_chunks
+from vcard import iter_vcards
+
+# Lower-cased source column names mapped to the database schema
+COLUMN_ALIASES = {
+    'name': 'Name', 'full name': 'Name', 'fullname': 'Name', 'contact name': 'Name', 'display name': 'Name',
+    'email': 'Email', 'e-mail': 'Email', 'email address': 'Email', 'e-mail address': 'Email',
+    'email 1 - value': 'Email', 'primary email': 'Email', 'work email': 'Email',
+    'phone': 'Phone', 'phone number': 'Phone', 'mobile': 'Phone', 'mobile phone': 'Phone',
+    'mobile number': 'Phone', 'telephone': 'Phone', 'work phone': 'Phone', 'business phone': 'Phone',
+    'phone 1 - value': 'Phone',
+    'designation': 'Designation', 'title': 'Designation', 'job title': 'Designation',
+    'position': 'Designation', 'role': 'Designation', 'organization 1 - title': 'Designation',
+    'company': 'Company', 'company name': 'Company', 'organization': 'Company', 'organisation': 'Company',
+    'account name': 'Company', 'organization 1 - name': 'Company',
+    'website': 'Website', 'web site': 'Website', 'url': 'Website', 'web page': 'Website',
+    'address': 'Address', 'business address': 'Address', 'street address': 'Address',
+    'mailing address': 'Address', 'address 1 - formatted': 'Address',
+}
+
+FIRST_NAME_ALIASES = ['first name', 'given name', 'firstname']
+LAST_NAME_ALIASES = ['last name', 'family name', 'surname', 'lastname']
+
+
+# ---------- COLUMN MAPPING ----------
+def map_columns(chunk):
+    """Map a chunk of source rows onto the contact database schema"""
+    lower_columns = {str(c).strip().lower(): c for c in chunk.columns}
+    mapped = pd.DataFrame(index=chunk.index)
+    for lower, source in lower_columns.items():
+        target = COLUMN_ALIASES.get(lower)
+        if target and target not in mapped.columns:
+            mapped[target] = chunk[source]
+
+    # Many CRM exports split the name in two columns
+    if 'Name' not in mapped.columns:
+        first = next((lower_columns[a] for a in FIRST_NAME_ALIASES if a in lower_columns), None)
+        last = next((lower_columns[a] for a in LAST_NAME_ALIASES if a in lower_columns), None)
+        if first or last:
+            parts = [chunk[c].fillna('').astype(str) for c in (first, last) if c]
+            full = parts[0] if len(parts) == 1 else parts[0] + ' ' + parts[1]
+            mapped['Name'] = full.str.strip()
+
+    mapped = mapped.reindex(columns=CONTACT_COLUMNS).fillna('').astype(str)
+    return mapped.apply(lambda col: col.str.strip())
+
+
+# ---------- STREAMING READERS ----------
+def iter_source_chunks(source, file_format, chunksize):
+    """Yield mapped DataFrame chunks from a CSV or vCard source"""
+    if file_format == 'csv':
+        reader = pd.read_csv(source, chunksize=chunksize, dtype=str, keep_default_na=False,
+                             encoding_errors='replace')
+        for chunk in reader:
+            yield map_columns(chunk)
+    elif file_format == 'vcf':
+        batch = []
+        for card in iter_vcards(source):
+            batch.append(card)
+            if len(batch) >= chunksize:
+                yield pd.DataFrame(batch).reindex(columns=CONTACT_COLUMNS).fillna('')
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch).reindex(columns=CONTACT_COLUMNS).fillna('')
+    else:
+        raise ValueError(f"Unsupported import format: {file_format}")
+
+
+def detect_format(name):
+    """Guess the import format from a file name"""
+    extension = os.path.splitext(str(name))[1].lower()
+    return 'vcf' if extension in ('.vcf', '.vcard') else 'csv'
+
+
+# ---------- DEDUPLICATION ----------
+def contact_keys(name, email, phone, company):
+    """Every dedupe key a contact has: email, phone (last 10 digits) and name + company"""
+    keys = []
+    email = str(email).strip().lower()
+    if email:
+        keys.append('e:' + email)
+    digits = re.sub(r'\D', '', str(phone))
+    if len(digits) >= 7:
+        keys.append('p:' + digits[-10:])
+    name = ' '.join(str(name).lower().split())
+    if name:
+        keys.append('n:' + name + '|' + ' '.join(str(company).lower().split()))
+    return keys
+
+
+def build_dedupe_index(csv_path, chunksize=50000):
+    """Collect the dedupe keys of all records already in the database"""
+    index = set()
+    for chunk in iter_database_chunks(csv_path, chunksize, usecols=['Name', 'Email', 'Phone', 'Company']):
+        chunk = chunk.reindex(columns=['Name', 'Email', 'Phone', 'Company']).fillna('')
+        for row in chunk.itertuples(index=False):
+            index.update(contact_keys(row.Name, row.Email, row.Phone, row.Company))
+    return index
+
+
+# ---------- IMPORT PIPELINE ----------
+def import_contacts(source, csv_path, file_format=None, chunksize=5000, progress=None):
+    """Import an external contact list into the database in deduplicated batches"""
+    if file_format is None:
+        file_format = detect_format(getattr(source, 'name', source))
+
+    start = time.perf_counter()
+    index = build_dedupe_index(csv_path)
+    stats = {'read': 0, 'imported': 0, 'duplicates': 0, 'skipped': 0}
+
+    for chunk in iter_source_chunks(source, file_format, chunksize):
+        keep = []
+        for position, row in enumerate(chunk.itertuples(index=False)):
+            keys = contact_keys(row.Name, row.Email, row.Phone, row.Company)
+            if not keys:
+                stats['skipped'] += 1
+            elif not index.isdisjoint(keys):
+                # A shared email, phone or name + company is enough
+                stats['duplicates'] += 1
+            else:
+                index.update(keys)
+                keep.append(position)
+        stats['read'] += len(chunk)
+        # One append per chunk keeps the write cost proportional to the batch size
+        stats['imported'] += append_records(csv_path, chunk.iloc[keep])
+
+        if progress is not None:
+            elapsed = time.perf_counter() - start
+            progress(stats['read'], stats['read'] / elapsed if elapsed > 0 else 0.0)
+
+    stats['seconds'] = time.perf_counter() - start
+    stats['rows_per_second'] = stats['read'] / stats['seconds'] if stats['seconds'] > 0 else 0.0
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import a CSV or vCard contact export into the card database")
+    parser.add_argument('source', help="CSV or .vcf file to import")
+    parser.add_argument('--db', default=os.path.join('visiting_cards_data', 'cards_data.csv'),
+                        help="Card database CSV (default: visiting_cards_data/cards_data.csv)")
+    parser.add_argument('--format', choices=['csv', 'vcf'], help="Input format (default: from extension)")
+    parser.add_argument('--chunksize', type=int, default=5000, help="Rows per read/commit batch")
+    args = parser.parse_args()
+
+    os.makedirs(os.path.dirname(args.db) or '.', exist_ok=True)
+
+    def report(rows, rate):
+        print(f"\r{rows} rows read ({rate:,.0f} rows/s)", end='', flush=True)
+
+    stats = import_contacts(args.source, args.db, args.format, args.chunksize, progress=report)
+    print()
+    print(f"Imported {stats['imported']} contacts, skipped {stats['duplicates']} duplicates "
+          f"and {stats['skipped']} empty rows in {stats['seconds']:.1f}s "
+          f"({stats['rows_per_second']:,.0f} rows/s)")
+
+
+if __name__ == '__main__':
+    main()
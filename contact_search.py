@@ -0,0 +1,272 @@
+import bisect
+import contextlib
+import json
+import os
+import re
+import threading
+
+import card_storage
+
+# Fields covered by the index, and the query prefixes that filter on them
+SEARCH_FIELDS = ['Name', 'Designation', 'Company', 'Email', 'Address']
+FIELD_ALIASES = {
+    'name': 'Name', 'designation': 'Designation', 'title': 'Designation', 'role': 'Designation',
+    'company': 'Company', 'org': 'Company', 'email': 'Email', 'address': 'Address', 'city': 'Address',
+}
+
+# Compact the change log into a fresh snapshot once it grows past this many entries
+MAX_LOG_ENTRIES = 500
+
+TOKEN_PATTERN = re.compile(r'[0-9a-z]+')
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def tokenize(text):
+    """Lower-case alphanumeric tokens of a field value"""
+    if not isinstance(text, str):
+        return []
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def index_paths(csv_path):
+    """Snapshot and change-log files stored next to the database"""
+    base = os.path.splitext(csv_path)[0]
+    return base + '.search.json', base + '.search.log'
+
+
+def _record_fields(row):
+    """Searchable field values of a record, with missing values as ''"""
+    fields = {}
+    for field in SEARCH_FIELDS:
+        value = row.get(field, '')
+        fields[field] = value if isinstance(value, str) else ''
+    return fields
+
+
+# ---------- INVERTED INDEX ----------
+class ContactIndex:
+    """Inverted index from field tokens to contact ids.
+
+    search and apply_change hold the index lock: sessions search the shared index
+    while database writes from other sessions update it.
+    """
+
+    def __init__(self):
+        self.docs = {}
+        self.postings = {field: {} for field in SEARCH_FIELDS}
+        self.sorted_tokens = {}
+        self.signature = None
+        self.lock = threading.Lock()
+
+    def add(self, record_id, fields):
+        if record_id in self.docs:
+            self.remove(record_id)
+        self.docs[record_id] = fields
+        for field in SEARCH_FIELDS:
+            postings = self.postings[field]
+            for token in set(tokenize(fields.get(field, ''))):
+                if token not in postings:
+                    postings[token] = set()
+                    self.sorted_tokens.pop(field, None)
+                postings[token].add(record_id)
+
+    def remove(self, record_id):
+        fields = self.docs.pop(record_id, None)
+        if fields is None:
+            return
+        for field in SEARCH_FIELDS:
+            postings = self.postings[field]
+            for token in set(tokenize(fields.get(field, ''))):
+                ids = postings.get(token)
+                if ids is not None:
+                    ids.discard(record_id)
+                    if not ids:
+                        del postings[token]
+                        self.sorted_tokens.pop(field, None)
+
+    def _tokens(self, field):
+        """Sorted token list of a field, rebuilt only after the vocabulary changed"""
+        tokens = self.sorted_tokens.get(field)
+        if tokens is None:
+            tokens = self.sorted_tokens[field] = sorted(self.postings[field])
+        return tokens
+
+    def _match(self, fields, token, prefix):
+        """Ids whose fields contain the token (or a token starting with it); may be shared, do not mutate"""
+        matches = []
+        for field in fields:
+            postings = self.postings[field]
+            if not prefix:
+                if token in postings:
+                    matches.append(postings[token])
+                continue
+            tokens = self._tokens(field)
+            i = bisect.bisect_left(tokens, token)
+            while i < len(tokens) and tokens[i].startswith(token):
+                matches.append(postings[tokens[i]])
+                i += 1
+        if len(matches) == 1:
+            return matches[0]
+        return set().union(*matches)
+
+    def search(self, query, limit=None):
+        """Ids of contacts matching every term, e.g. 'company:acme title:vp pune'"""
+        # Terms match whole tokens; a term ending in '*' and the last term
+        # (the one still being typed) match as prefixes
+        with self.lock:
+            return self._search(query.split(), limit)
+
+    def _search(self, terms, limit):
+        candidates = []
+        for n, term in enumerate(terms):
+            fields = SEARCH_FIELDS
+            if ':' in term:
+                name, term = term.split(':', 1)
+                if name.lower() in FIELD_ALIASES:
+                    fields = [FIELD_ALIASES[name.lower()]]
+            prefix = term.endswith('*') or n == len(terms) - 1
+            for token in tokenize(term):
+                ids = self._match(fields, token, prefix)
+                if not ids:
+                    return []
+                candidates.append(ids)
+        if not candidates:
+            return []
+
+        # Intersect starting from the rarest term so the work tracks the result size
+        candidates.sort(key=len)
+        result = list(candidates[0].intersection(*candidates[1:]))
+        return result[:limit] if limit else result
+
+    def apply_change(self, added, removed, signature):
+        """Apply one database write and move the index to the file signature after it"""
+        with self.lock:
+            for record_id in removed:
+                self.remove(record_id)
+            for record_id, fields in added.items():
+                self.add(record_id, fields)
+            self.signature = signature
+
+
+# ---------- PERSISTENCE ----------
+def build_index(csv_path):
+    """Build the index from the database, reading it in chunks (caller holds the lock)"""
+    index = ContactIndex()
+    index.signature = card_storage.file_signature(csv_path)
+    for chunk in card_storage.iter_database_chunks(csv_path, usecols=['Id'] + SEARCH_FIELDS, lock=False):
+        for row in chunk.to_dict('records'):
+            if row.get('Id'):
+                index.add(row['Id'], _record_fields(row))
+    return index
+
+
+def save_snapshot(csv_path, index):
+    """Write the index snapshot atomically and start a new change log"""
+    snapshot_path, log_path = index_paths(csv_path)
+    # One temp file per writer, so concurrent sessions never write into the same file
+    tmp_path = f"{snapshot_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'signature': index.signature, 'docs': index.docs}, f)
+        os.replace(tmp_path, snapshot_path)
+    except:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(log_path)
+
+
+def load_snapshot(csv_path):
+    """Load the persisted snapshot and replay its change log; None if it is stale"""
+    snapshot_path, log_path = index_paths(csv_path)
+    try:
+        with open(snapshot_path, encoding='utf-8') as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None, 0
+
+    index = ContactIndex()
+    for record_id, fields in snapshot['docs'].items():
+        index.add(record_id, fields)
+    index.signature = snapshot['signature']
+
+    entries = 0
+    if os.path.exists(log_path):
+        with open(log_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                if entry['before'] != index.signature:
+                    continue
+                index.apply_change(entry['added'], entry['removed'], entry['after'])
+                entries += 1
+    if index.signature != card_storage.file_signature(csv_path):
+        return None, entries
+    return index, entries
+
+
+def get_index(csv_path):
+    """Return the up-to-date index for a database, loading or rebuilding it as needed"""
+    key = os.path.abspath(csv_path)
+    with _indexes_lock:
+        index = _indexes.get(key)
+    if index is not None and index.signature == card_storage.file_signature(csv_path):
+        return index
+
+    # Not holding _indexes_lock here: writers take it inside the database lock
+    with card_storage.database_lock(csv_path, shared=True):
+        index, entries = load_snapshot(csv_path)
+    if index is None or entries > MAX_LOG_ENTRIES:
+        # Replacing the snapshot and dropping the log must not interleave with a
+        # write appending to the log, or with another session compacting
+        with card_storage.database_lock(csv_path):
+            index, entries = load_snapshot(csv_path)
+            if index is None:
+                index = build_index(csv_path)
+                save_snapshot(csv_path, index)
+            elif entries > MAX_LOG_ENTRIES:
+                save_snapshot(csv_path, index)
+    with _indexes_lock:
+        _indexes[key] = index
+    return index
+
+
+def search_contacts(csv_path, query, limit=None):
+    """Ids of contacts in the database matching the query"""
+    if not query.strip() or not os.path.exists(csv_path):
+        return []
+    return get_index(csv_path).search(query, limit)
+
+
+def _on_database_write(csv_path, added_df, removed_ids, before, after):
+    """Keep the persisted log and any in-memory index in step with database writes"""
+    snapshot_path, log_path = index_paths(csv_path)
+    if added_df is None and not removed_ids:
+        # The whole file was rewritten; force a rebuild
+        if os.path.exists(snapshot_path):
+            os.remove(snapshot_path)
+        with _indexes_lock:
+            _indexes.pop(os.path.abspath(csv_path), None)
+        return
+
+    added = {}
+    if added_df is not None:
+        for row in added_df.to_dict('records'):
+            added[str(row['Id'])] = _record_fields(row)
+    if os.path.exists(snapshot_path):
+        with open(log_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'before': before, 'after': after,
+                                'added': added, 'removed': list(removed_ids)}) + '\n')
+
+    with _indexes_lock:
+        index = _indexes.get(os.path.abspath(csv_path))
+        if index is not None and index.signature == before:
+            index.apply_change(added, removed_ids, after)
+
+
+card_storage.add_write_listener(_on_database_write)
@@ -0,0 +1,278 @@
+import argparse
+import json
+import logging
+import os
+import random
+import re
+import statistics
+import sys
+import time
+
+import card_extraction
+
+FIELDS = ['name', 'email', 'phone', 'website', 'company', 'designation', 'address']
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CORPUS_PATH = os.path.join(HERE, 'extraction_corpus.json')
+BASELINE_PATH = os.path.join(HERE, 'extraction_baseline.json')
+
+# Allowed drop against the baseline before the run fails
+MAX_SCORE_DROP = 0.02       # absolute, for precision and recall
+MAX_SPEED_DROP = 0.30       # relative, for records/second against the host reference
+# Worst-case bound for adversarial OCR output
+MAX_FUZZ_P999_SECONDS = 0.1
+
+
+# ---------- EXTRACTORS ----------
+def load_extractors():
+    """Return {name: extract_all_fields callable}; the Kivy app is skipped if Kivy is missing"""
+    extractors = {'card_extraction': card_extraction.extract_all_fields}
+    # Keep Kivy from parsing this script's command line
+    os.environ.setdefault('KIVY_NO_ARGS', '1')
+    try:
+        from main import CardReaderApp
+    except ImportError as e:
+        print(f"Skipping main.CardReaderApp: {e}", file=sys.stderr)
+    else:
+        # The extraction methods only use other methods, so no App setup is needed
+        app = CardReaderApp.__new__(CardReaderApp)
+        extractors['main.CardReaderApp'] = app.extract_all_fields
+    return extractors
+
+
+# ---------- SCORING ----------
+def _tokens(value):
+    return re.findall(r'[0-9a-z]+', value.lower())
+
+
+def field_matches(field, predicted, expected):
+    """Whether an extracted value counts as correct for the field"""
+    if field == 'phone':
+        return re.sub(r'\D', '', predicted) == re.sub(r'\D', '', expected)
+    if field == 'website':
+        strip = lambda v: re.sub(r'^(https?://)?(www\.)?', '', v.strip().lower()).rstrip('/')
+        return strip(predicted) == strip(expected)
+    if field == 'company':
+        # Same words, ignoring case and punctuation
+        return _tokens(predicted) == _tokens(expected)
+    if field == 'address':
+        # Every predicted token must belong to the address, so stray phone or company
+        # lines fail it; a partial address still counts if it has most of the tokens
+        p, e = _tokens(predicted), set(_tokens(expected))
+        inside = sum(token in e for token in p)
+        return bool(p) and inside / len(p) >= 0.9 and len(e & set(p)) / len(e) >= 0.5
+    return ' '.join(predicted.lower().split()) == ' '.join(expected.lower().split())
+
+
+def score(extract, samples):
+    """Per-field precision/recall of an extractor over the corpus"""
+    counts = {f: {'predicted': 0, 'expected': 0, 'correct': 0} for f in FIELDS}
+    failures = []
+    for sample in samples:
+        result = extract(sample['text'])
+        for field in FIELDS:
+            predicted = (result.get(field) or '').strip()
+            expected = sample['expected'].get(field, '').strip()
+            counts[field]['predicted'] += bool(predicted)
+            counts[field]['expected'] += bool(expected)
+            if predicted and expected and field_matches(field, predicted, expected):
+                counts[field]['correct'] += 1
+            elif predicted or expected:
+                failures.append((sample['id'], field, predicted, expected))
+
+    metrics = {}
+    for field, c in counts.items():
+        metrics[field] = {
+            'precision': c['correct'] / c['predicted'] if c['predicted'] else 1.0,
+            'recall': c['correct'] / c['expected'] if c['expected'] else 1.0,
+        }
+    return metrics, failures
+
+
+def throughput(extract, samples, min_seconds=0.5):
+    """Records per second, repeating the corpus for at least min_seconds"""
+    records = 0
+    start = time.perf_counter()
+    while True:
+        for sample in samples:
+            extract(sample['text'])
+        records += len(samples)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return records / elapsed
+
+
+def reference_extract(text):
+    """Fixed stand-in workload (split, lower-case, tokenise) that calibrates the host speed"""
+    return [_tokens(line) for line in text.split('\n')]
+
+
+def relative_speed(extract, samples, runs=5):
+    """Throughput as a multiple of reference_extract on this host: median of short paired runs.
+
+    Absolute records/second vary between machines and with load; the ratio to a
+    reference measured right next to it varies far less.
+    """
+    ratios = []
+    for _ in range(runs):
+        reference = throughput(reference_extract, samples, 0.1)
+        ratios.append(throughput(extract, samples, 0.1) / reference)
+    return statistics.median(ratios)
+
+
+# ---------- WORST CASE ----------
+# Characters OCR produces from smudges, borders and background texture
+NOISE_ALPHABET = 'aAeEoOlI1i0._-@+|/\\:;,()[]{}*~ '
+
+
+def fuzz_inputs(count, seed=0, samples=()):
+    """Adversarial OCR texts: long junk lines, address-like and digit-like runs, huge line counts"""
+    rng = random.Random(seed)
+    repeats = ['a.', 'a@', 'a.a@', '.@', 'a-', '1 ', '9', '1.', '(1', 'st rd ', '123456 ']
+    texts = []
+    for i in range(count):
+        kind = i % 5
+        if kind == 0:
+            text = ''.join(rng.choice(NOISE_ALPHABET) for _ in range(rng.randint(1000, 50000)))
+        elif kind == 1:
+            text = rng.choice(repeats) * rng.randint(1000, 25000)
+        elif kind == 2:
+            text = rng.choice(repeats) * rng.randint(500, 5000) + '@' + 'a.' * rng.randint(500, 5000)
+        elif kind == 3:
+            text = '\n'.join(''.join(rng.choice(NOISE_ALPHABET) for _ in range(rng.randint(0, 80)))
+                             for _ in range(rng.randint(100, 3000)))
+        else:
+            # A real card with a junk line in the middle
+            sample = rng.choice(samples)['text'] if samples else 'John Doe\nManager'
+            junk = rng.choice(repeats) * rng.randint(1000, 10000)
+            lines = sample.split('\n')
+            lines.insert(rng.randint(0, len(lines)), junk)
+            text = '\n'.join(lines)
+        texts.append(text)
+    return texts
+
+
+def fuzz_timing(extract, texts):
+    """Per-call extraction time percentiles over adversarial texts"""
+    times = []
+    for text in texts:
+        start = time.perf_counter()
+        extract(text)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    pick = lambda q: times[min(int(q * len(times)), len(times) - 1)]
+    return {'p50': pick(0.5), 'p99': pick(0.99), 'p99.9': pick(0.999), 'max': times[-1]}
+
+
+def run_fuzz(count, corpus_path=CORPUS_PATH, seed=0):
+    """Time every extractor on adversarial inputs; returns the extractors whose p99.9 is over the bound"""
+    with open(corpus_path, encoding='utf-8') as f:
+        samples = json.load(f)['samples']
+    texts = fuzz_inputs(count, seed, samples)
+    # Every one of these is truncated; the warnings would drown the report
+    logging.getLogger(card_extraction.__name__).setLevel(logging.ERROR)
+    print(f"{count} adversarial inputs, {max(len(t) for t in texts):,} characters at most")
+    print(f"  {'extractor':<20} {'p50 ms':>8} {'p99 ms':>8} {'p99.9 ms':>9} {'max ms':>8}")
+    problems = []
+    for name, extract in load_extractors().items():
+        timing = fuzz_timing(extract, texts)
+        print(f"  {name:<20} {1000 * timing['p50']:>8.2f} {1000 * timing['p99']:>8.2f} "
+              f"{1000 * timing['p99.9']:>9.2f} {1000 * timing['max']:>8.2f}")
+        if timing['p99.9'] > MAX_FUZZ_P999_SECONDS:
+            problems.append(f"{name}: p99.9 extraction time {1000 * timing['p99.9']:.1f} ms "
+                            f"exceeds {1000 * MAX_FUZZ_P999_SECONDS:.0f} ms")
+    return problems
+
+
+# ---------- REGRESSION CHECK ----------
+def compare(name, metrics, speed, baseline):
+    """List of regressions of one extractor against its baseline entry"""
+    problems = []
+    reference = baseline.get(name)
+    if reference is None:
+        return problems
+    for field in FIELDS:
+        for key in ('precision', 'recall'):
+            old = reference['fields'][field][key]
+            new = metrics[field][key]
+            if new < old - MAX_SCORE_DROP:
+                problems.append(f"{name}: {field} {key} dropped {old:.3f} -> {new:.3f}")
+    if speed < reference['relative_speed'] * (1 - MAX_SPEED_DROP):
+        problems.append(f"{name}: throughput dropped {reference['relative_speed']:.3f} "
+                        f"-> {speed:.3f} x the reference workload")
+    return problems
+
+
+def run(corpus_path=CORPUS_PATH, baseline_path=BASELINE_PATH, update_baseline=False, verbose=False):
+    with open(corpus_path, encoding='utf-8') as f:
+        samples = json.load(f)['samples']
+    baseline = {}
+    if os.path.exists(baseline_path):
+        with open(baseline_path, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    results = {}
+    problems = []
+    outputs = {}
+    for name, extract in load_extractors().items():
+        metrics, failures = score(extract, samples)
+        speed = relative_speed(extract, samples)
+        results[name] = {'fields': metrics, 'relative_speed': speed}
+        outputs[name] = [extract(s['text']) for s in samples]
+        problems += compare(name, metrics, speed, baseline)
+
+        print(f"\n{name}: {speed:.3f} x the reference workload")
+        print(f"  {'field':<12} {'precision':>9} {'recall':>7}")
+        for field in FIELDS:
+            print(f"  {field:<12} {metrics[field]['precision']:>9.3f} {metrics[field]['recall']:>7.3f}")
+        if verbose:
+            for sample_id, field, predicted, expected in failures:
+                print(f"  [{sample_id}] {field}: got {predicted!r}, expected {expected!r}")
+
+    # Both apps share card_extraction, so they must extract exactly the same fields
+    names = list(outputs)
+    for other in names[1:]:
+        drift = 0
+        for sample, a, b in zip(samples, outputs[names[0]], outputs[other]):
+            for field in FIELDS:
+                if a.get(field) != b.get(field):
+                    drift += 1
+                    if verbose:
+                        print(f"  drift [{sample['id']}] {field}: {names[0]}={a.get(field)!r} {other}={b.get(field)!r}")
+        print(f"\n{drift} field values differ between {names[0]} and {other}")
+        if drift:
+            problems.append(f"{names[0]} and {other} disagree on {drift} fields")
+
+    if update_baseline:
+        baseline.update(results)
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"\nBaseline written to {baseline_path}")
+        return []
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accuracy and throughput regression suite for field extraction")
+    parser.add_argument('--corpus', default=CORPUS_PATH)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true', help="Record the current results as the baseline")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Show every mismatched field")
+    parser.add_argument('--fuzz', type=int, metavar='N',
+                        help="Instead, time extraction on N adversarial inputs and check the p99.9 bound")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for --fuzz inputs")
+    args = parser.parse_args()
+
+    if args.fuzz:
+        problems = run_fuzz(args.fuzz, args.corpus, args.seed)
+    else:
+        problems = run(args.corpus, args.baseline, args.update_baseline, args.verbose)
+    if problems:
+        print("\nREGRESSIONS:")
+        for problem in problems:
+            print(f"  {problem}")
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
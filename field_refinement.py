@@ -0,0 +1,136 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+import pytesseract
+from PIL import Image
+
+import ocr_tuning
+from card_extraction import extract_email, extract_phone_numbers
+
+# Single text line, restricted to the characters the field can contain
+FIELD_CONFIGS = {
+    'email': r'--oem 1 --psm 7 -c tessedit_char_whitelist='
+             r'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789@._-+',
+    'phone': r'--oem 1 --psm 7 -c tessedit_char_whitelist=0123456789+-()',
+}
+# Tesseract reads best with text at least this many pixels high
+MIN_CROP_HEIGHT = 32
+REFINE_WORKERS = 4
+
+# A word that is a phone number fragment, allowing for the usual O/0, l/1, S/5, B/8 confusions
+_PHONE_WORD = re.compile(r'^[\d+()\-.OoIlSB|]+$')
+
+
+# ---------- OCR LINES ----------
+def ocr_lines(image, lang=None, config=''):
+    """OCR an image into lines of words, each word with its box"""
+    with ocr_tuning.tesseract_slots():
+        data = pytesseract.image_to_data(image, lang=lang, config=config, output_type=pytesseract.Output.DICT)
+    lines = []
+    current = None
+    for i, word in enumerate(data['text']):
+        if not word.strip():
+            continue
+        key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+        if current is None or current['key'] != key:
+            current = {'key': key, 'words': []}
+            lines.append(current)
+        current['words'].append({'text': word.strip(), 'left': data['left'][i], 'top': data['top'][i],
+                                 'width': data['width'][i], 'height': data['height'][i]})
+    return lines
+
+
+def lines_text(lines):
+    """Plain text of OCR lines, with a blank line between paragraphs like image_to_string"""
+    parts = []
+    previous = None
+    for line in lines:
+        if previous is not None and line['key'][:2] != previous:
+            parts.append('')
+        parts.append(' '.join(word['text'] for word in line['words']))
+        previous = line['key'][:2]
+    return '\n'.join(parts)
+
+
+# ---------- CANDIDATES ----------
+def _email_span(words):
+    for i, word in enumerate(words):
+        if '@' in word['text']:
+            return i, i + 1
+    return None
+
+
+def _phone_span(words):
+    """Longest run of phone-like words holding enough digits to be a number"""
+    best = None
+    start = None
+    for i in range(len(words) + 1):
+        if i < len(words) and _PHONE_WORD.match(words[i]['text']) and re.search(r'\d', words[i]['text']):
+            if start is None:
+                start = i
+            continue
+        if start is not None:
+            digits = sum(len(re.sub(r'[^\d+]', '', w['text'])) for w in words[start:i])
+            if digits >= 7 and (best is None or i - start > best[1] - best[0]):
+                best = (start, i)
+            start = None
+    return best
+
+
+def find_candidates(lines):
+    """(field, line index, word span) of the first email and phone number in the OCR lines"""
+    candidates = []
+    for field, span_of in (('email', _email_span), ('phone', _phone_span)):
+        for index, line in enumerate(lines):
+            span = span_of(line['words'])
+            if span is not None:
+                candidates.append((field, index, span))
+                break
+    return candidates
+
+
+# ---------- SECOND PASS ----------
+def _crop(image, words):
+    left = min(w['left'] for w in words)
+    top = min(w['top'] for w in words)
+    right = max(w['left'] + w['width'] for w in words)
+    bottom = max(w['top'] + w['height'] for w in words)
+    pad = max(4, (bottom - top) // 3)
+    crop = image.crop((max(left - pad, 0), max(top - pad, 0),
+                       min(right + pad, image.width), min(bottom + pad, image.height)))
+    if bottom - top < MIN_CROP_HEIGHT:
+        scale = MIN_CROP_HEIGHT / float(max(bottom - top, 1))
+        crop = crop.resize((int(crop.width * scale), int(crop.height * scale)), Image.BICUBIC)
+    return crop
+
+
+def _reocr(field, crop):
+    with ocr_tuning.tesseract_slots():
+        text = pytesseract.image_to_string(crop, config=FIELD_CONFIGS[field]).strip()
+    if field == 'email':
+        return extract_email(text)
+    return text if extract_phone_numbers(text) else ''
+
+
+def refine_lines(image, lines, workers=REFINE_WORKERS):
+    """Re-OCR the email and phone words with field whitelists and substitute what they read.
+
+    Returns the corrected lines and the fields whose text changed.
+    """
+    candidates = find_candidates(lines)
+    if not candidates:
+        return lines, []
+    crops = [_crop(image, lines[index]['words'][start:end]) for _, index, (start, end) in candidates]
+    with ThreadPoolExecutor(max_workers=min(len(crops), workers)) as executor:
+        values = list(executor.map(_reocr, [field for field, _, _ in candidates], crops))
+
+    corrected = []
+    for (field, index, (start, end)), value in zip(candidates, values):
+        words = lines[index]['words']
+        original = ''.join(w['text'] for w in words[start:end])
+        # Tesseract may space a number differently; only a change in the characters counts
+        if not value or re.sub(r'\s', '', value) == re.sub(r'\s', '', original):
+            continue
+        merged = dict(words[start], text=value)
+        lines[index] = dict(lines[index], words=words[:start] + [merged] + words[end:])
+        corrected.append(field)
+    return lines, corrected
@@ -0,0 +1,120 @@
+import argparse
+import glob
+import multiprocessing
+import os
+import tempfile
+import time
+from PIL import Image, ImageOps
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Longest side of the working image; OCR gains nothing from more pixels on a card
+WORKING_SIZE = 2000
+# Longest side for scans that may hold several cards; an A4 page at 300 dpi is 3508 px
+PAGE_SIZE = 3600
+
+
+def decode_image(source, max_side=WORKING_SIZE):
+    """Decode an image at (about) working resolution, with EXIF orientation applied"""
+    image = Image.open(source)
+    width, height = image.size
+    scale = max_side / float(max(width, height))
+    if scale < 1 and image.format == 'JPEG':
+        # JPEG can scale by 1/2, 1/4 or 1/8 in the DCT domain while decoding
+        image.draft('RGB', (int(width * scale), int(height * scale)))
+    image.load()
+    image = ImageOps.exif_transpose(image)
+    if max(image.size) > max_side:
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+    return image
+
+
+def downscaled(image, max_side):
+    """The image itself if it fits within max_side, else a resized copy; never modifies the caller's image"""
+    if max(image.size) <= max_side:
+        return image
+    small = image.copy()
+    small.thumbnail((max_side, max_side))
+    return small
+
+
+def full_decode(source):
+    """Decode at native resolution, as Image.open + EXIF transpose would"""
+    image = Image.open(source)
+    image.load()
+    return ImageOps.exif_transpose(image)
+
+
+# ---------- BENCHMARK ----------
+def _peak_rss_kb():
+    # VmHWM belongs to this process image; ru_maxrss is inherited from the parent on Linux
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    if resource is None:
+        return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _measure(path, method):
+    """Decode once in a fresh process; returns (seconds, peak memory growth in MB, size)"""
+    before = _peak_rss_kb()
+    start = time.perf_counter()
+    image = decode_image(path) if method == 'reduced' else full_decode(path)
+    seconds = time.perf_counter() - start
+    return seconds, (_peak_rss_kb() - before) / 1024.0, image.size
+
+
+def make_sample(path, megapixels):
+    """Write a synthetic camera-sized JPEG for the benchmark"""
+    width = int((megapixels * 1e6 * 4 / 3) ** 0.5)
+    height = int(width * 3 / 4)
+    base = Image.effect_noise((width // 8, height // 8), 40).resize((width, height))
+    base.convert('RGB').save(path, format='JPEG', quality=90)
+    return path
+
+
+def benchmark(paths, repeat=3):
+    """Decode time and peak memory of full vs reduced-scale decoding, each run in its own process"""
+    context = multiprocessing.get_context('spawn')
+    rows = []
+    for path in paths:
+        with Image.open(path) as image:
+            source_size = image.size
+        for method in ('full', 'reduced'):
+            runs = []
+            for _ in range(repeat):
+                with context.Pool(1) as pool:
+                    runs.append(pool.apply(_measure, (path, method)))
+            seconds = sorted(r[0] for r in runs)[len(runs) // 2]
+            peak_mb = max(r[1] for r in runs)
+            rows.append((os.path.basename(path), source_size, method, seconds, peak_mb, runs[0][2]))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark full vs reduced-scale image decoding")
+    parser.add_argument('images', nargs='*', help="Photos to decode (default: synthetic 12 MP and 48 MP JPEGs)")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    paths = [p for pattern in args.images for p in sorted(glob.glob(pattern))]
+    if not paths:
+        tmp_dir = tempfile.mkdtemp(prefix='card_decode_')
+        paths = [make_sample(os.path.join(tmp_dir, f'sample_{mp}mp.jpg'), mp) for mp in (12, 48)]
+
+    print(f"{'image':<20} {'source':>11} {'method':<8} {'ms':>8} {'peak MB':>8} {'decoded':>11}")
+    for name, source, method, seconds, peak_mb, size in benchmark(paths, args.repeat):
+        print(f"{name:<20} {'%dx%d' % source:>11} {method:<8} {1000 * seconds:>8.1f} "
+              f"{peak_mb:>8.1f} {'%dx%d' % size:>11}")
+
+
+if __name__ == '__main__':
+    main()
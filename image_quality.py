@@ -0,0 +1,109 @@
+import time
+import numpy as np
+
+# Thresholds are calibrated for the downscaled copy (longest side ANALYSIS_SIZE)
+ANALYSIS_SIZE = 400
+DEFAULT_THRESHOLDS = {
+    'min_sharpness': 60.0,      # variance of the Laplacian
+    'max_glare': 0.20,          # fraction covered by blown-out spots
+    'min_text_density': 0.015,  # fraction of strong-edge pixels
+}
+
+
+def _analysis_array(image):
+    """Downscale the image and return it as a float32 grayscale array"""
+    if image.mode not in ('L', 'RGB', 'RGBA'):
+        image = image.convert('RGB')
+    factor = max(image.size) // ANALYSIS_SIZE
+    small = image.reduce(factor) if factor > 1 else image
+    if small.mode != 'L':
+        small = small.convert('L')
+    return np.asarray(small, dtype=np.float32)
+
+
+def laplacian_variance(a):
+    """Variance of the 4-neighbour Laplacian, a cheap focus measure"""
+    lap = a[1:-1, :-2] + a[1:-1, 2:] + a[:-2, 1:-1] + a[2:, 1:-1] - 4 * a[1:-1, 1:-1]
+    return float(lap.var())
+
+
+def paper_level(a, edge=40, reach=4):
+    """Brightness of the card stock beside the text, or None when there is no text.
+
+    Takes the brightest pixel within reach of each strong horizontal edge, in any direction, so soft or
+    anti-aliased strokes still reach the paper, and returns the lower decile: text
+    fading into a hot spot only lifts the top of the distribution.
+    """
+    strong = np.abs(a[:, 1:] - a[:, :-1]) > edge
+    if not strong.any():
+        return None
+    # Maximum over a (2 * reach + 1) square, one axis at a time
+    rows = a.copy()
+    for shift in range(1, reach + 1):
+        np.maximum(rows[shift:], a[:-shift], out=rows[shift:])
+        np.maximum(rows[:-shift], a[shift:], out=rows[:-shift])
+    brightest = rows.copy()
+    for shift in range(1, reach + 1):
+        np.maximum(brightest[:, shift:], rows[:, :-shift], out=brightest[:, shift:])
+        np.maximum(brightest[:, :-shift], rows[:, shift:], out=brightest[:, :-shift])
+    return float(np.percentile(brightest[:, :-1][strong], 10))
+
+
+def glare_fraction(a, level=250, margin=15, spot=2):
+    """Fraction of the image covered by blown-out highlights brighter than the card stock.
+
+    White paper scanned or shot against white clips as well, so when the paper
+    around the text already reaches level - margin nothing counts as glare. Otherwise
+    only clipped pixels in spots at least 2 * spot + 1 pixels across are counted, so
+    bright gaps between letters do not add up.
+    """
+    paper = paper_level(a)
+    if paper is not None and paper >= level - margin:
+        return 0.0
+    clipped = a >= level
+    # Erode the clipped mask with a (2 * spot + 1) square, one axis at a time
+    size = 2 * spot + 1
+    rows = clipped[:a.shape[0] - size + 1].copy()
+    for dy in range(1, size):
+        rows &= clipped[dy:dy + rows.shape[0]]
+    core = rows[:, :a.shape[1] - size + 1].copy()
+    for dx in range(1, size):
+        core &= rows[:, dx:dx + core.shape[1]]
+    return float(np.count_nonzero(core)) / a.size
+
+
+def text_density(a, edge=40):
+    """Fraction of pixels with a strong horizontal or vertical gradient"""
+    gx = np.abs(a[:, 1:] - a[:, :-1])[:-1, :]
+    gy = np.abs(a[1:, :] - a[:-1, :])[:, :-1]
+    return float(np.count_nonzero(np.maximum(gx, gy) > edge)) / gx.size
+
+
+def assess_quality(image, thresholds=None):
+    """Check whether a capture is sharp, glare-free and text-bearing enough for OCR"""
+    limits = dict(DEFAULT_THRESHOLDS)
+    if thresholds:
+        limits.update(thresholds)
+
+    start = time.perf_counter()
+    a = _analysis_array(image)
+    sharpness = laplacian_variance(a)
+    glare = glare_fraction(a)
+    density = text_density(a)
+
+    issues = []
+    if sharpness < limits['min_sharpness']:
+        issues.append("Image is blurry - hold the camera steady and tap to focus")
+    if glare > limits['max_glare']:
+        issues.append("Too much glare - tilt the card or move away from direct light")
+    if density < limits['min_text_density']:
+        issues.append("Little or no text detected - move closer so the card fills the frame")
+
+    return {
+        'ok': not issues,
+        'issues': issues,
+        'sharpness': sharpness,
+        'glare': glare,
+        'text_density': density,
+        'seconds': time.perf_counter() - start,
+    }
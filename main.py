@@ -8,18 +8,36 @@ from kivy.uix.image import Image
 from kivy.uix.filechooser import FileChooserIconView
 from kivy.uix.popup import Popup
 from kivy.uix.camera import Camera
+from kivy.graphics import Fbo, Rectangle
 from kivy.graphics.texture import Texture
 from kivy.clock import Clock
+from kivy.logger import Logger
 import cv2
 import numpy as np
 from PIL import Image as PILImage
 import pytesseract
-import re
 import os
+import threading
+import time
+
+import card_extraction
+import image_decode
+from card_detection import ANALYSIS_WIDTH, MIN_SHARPNESS, CardDetector, AutoCapture
+import image_preprocessing
+import image_quality
+import qr_fastpath
+import script_detection
 
 # Set the minimum Kivy version
 kivy.require('2.0.0')
 
+# Requested camera resolution; the captured frame is used for OCR at this size
+CAMERA_RESOLUTION = (1920, 1080)
+# Longest side of the on-screen preview texture
+PREVIEW_SIZE = 1024
+# Preview frames analysed per second; frames arriving while analysis is busy are skipped
+ANALYSIS_FPS = 8
+
 class CardReaderApp(App):
     def build(self):
         self.title = 'Smart Visiting Card Reader'
@@ -79,6 +97,8 @@ class CardReaderApp(App):
         # Initialize variables
         self.current_image = None
         self.extracted_data = {}
+        self.quality_check = True
+        self.quality_thresholds = dict(image_quality.DEFAULT_THRESHOLDS)
         
         return main_layout
     
@@ -113,49 +133,211 @@ class CardReaderApp(App):
         popup.open()
     
     def capture_image(self, instance):
-        # For iOS, we'll simulate this with a placeholder
-        # In a real implementation, you would use the camera API
-        popup = Popup(title='Camera',
-                      content=Label(text='Camera functionality would be implemented here\n(Tap to close)', 
-                                   on_touch_down=lambda *args: popup.dismiss()),
-                      size_hint=(0.8, 0.6))
-        popup.open()
+        # Live preview; the card is captured automatically once it is held steady and sharp
+        try:
+            self.camera = Camera(play=True, resolution=CAMERA_RESOLUTION)
+        except Exception as e:
+            popup = Popup(title='Error',
+                          content=Label(text=f'Camera not available: {str(e)}'),
+                          size_hint=(0.6, 0.4))
+            popup.open()
+            return
+        
+        content = BoxLayout(orientation='vertical', spacing=10)
+        content.add_widget(self.camera)
+        self.camera_status = Label(text='Hold the card inside the frame', size_hint_y=None, height=30)
+        content.add_widget(self.camera_status)
+        
+        button_layout = BoxLayout(size_hint_y=None, height=50, spacing=10)
+        capture_btn = Button(text='Capture Now')
+        cancel_btn = Button(text='Cancel')
+        button_layout.add_widget(capture_btn)
+        button_layout.add_widget(cancel_btn)
+        content.add_widget(button_layout)
+        
+        self.camera_popup = Popup(title='Camera', content=content, size_hint=(0.95, 0.95))
+        
+        # Analysis runs on its own thread; a thread left over from an earlier opening sees
+        # that its session is no longer current and exits
+        self.camera_session = session = object()
+        self.analysis_busy = False
+        self.frame_ready = threading.Event()
+        self.preview_fbo = None
+        threading.Thread(target=self.analysis_loop, args=(session, self.frame_ready), daemon=True).start()
+        self.preview_event = Clock.schedule_interval(self.grab_preview_frame, 1.0 / ANALYSIS_FPS)
+        
+        capture_btn.bind(on_press=lambda *args: self.capture_frame())
+        cancel_btn.bind(on_press=lambda *args: self.close_camera())
+        self.camera_popup.bind(on_dismiss=lambda *args: self.stop_camera())
+        self.camera_popup.open()
+    
+    def texture_frame(self, texture):
+        """RGBA array of a texture's pixels (bottom row first, as OpenGL returns them)"""
+        return np.frombuffer(texture.pixels, np.uint8).reshape(texture.height, texture.width, 4)
+    
+    def grab_preview_frame(self, dt):
+        # UI thread: hand the newest frame to the analysis thread unless it is still busy
+        texture = self.camera.texture
+        if texture is None or self.analysis_busy:
+            return
+        if self.preview_fbo is None:
+            # The GPU scales the frame down to analysis size, so only this small target is read back
+            width = ANALYSIS_WIDTH
+            height = max(int(round(texture.height * width / float(texture.width))), 1)
+            self.preview_fbo = Fbo(size=(width, height))
+            with self.preview_fbo:
+                self.preview_rect = Rectangle(size=(width, height))
+            self.pending_frame = np.empty((height, width, 4), np.uint8)
+        self.preview_rect.texture = texture
+        self.preview_fbo.draw()
+        # The analysis thread is idle, so the frame buffer can be refilled in place
+        np.copyto(self.pending_frame,
+                  np.frombuffer(self.preview_fbo.pixels, np.uint8).reshape(self.pending_frame.shape))
+        self.analysis_busy = True
+        self.frame_ready.set()
+    
+    def analysis_loop(self, session, frame_ready):
+        # Buffers are reused from frame to frame and belong to this thread
+        detector = CardDetector()
+        auto_capture = AutoCapture()
+        while True:
+            frame_ready.wait()
+            frame_ready.clear()
+            if self.camera_session is not session:
+                return
+            frame = self.pending_frame
+            try:
+                result = detector.analyze(frame)
+                ready = auto_capture.update(result, frame) and result['sharpness'] >= MIN_SHARPNESS
+            except Exception as e:
+                result, ready = {'found': False, 'sharpness': 0.0}, False
+            Clock.schedule_once(lambda dt, result=result, ready=ready: self.preview_analyzed(session, result, ready))
+            if ready:
+                # Captured: leave analysis_busy set so no further frames are handed over
+                return
+            if self.camera_session is session:
+                self.analysis_busy = False
+    
+    def preview_analyzed(self, session, result, ready):
+        if self.camera_session is not session:
+            return
+        if ready:
+            # Steady and in focus: read the camera frame at full resolution, once
+            self.capture_frame()
+        elif not result['found']:
+            self.camera_status.text = 'Hold the card inside the frame'
+        elif result['sharpness'] < MIN_SHARPNESS:
+            self.camera_status.text = 'Card found - hold still to focus'
+        else:
+            self.camera_status.text = 'Card found - hold steady...'
+    
+    def capture_frame(self):
+        texture = self.camera.texture
+        if texture is not None:
+            self.use_camera_image(self.frame_image(self.texture_frame(texture)))
+    
+    def frame_image(self, frame):
+        """RGB image of an RGBA frame array"""
+        # The frame is bottom-up like the texture it came from; a negative row step reads it upright
+        size = (frame.shape[1], frame.shape[0])
+        return PILImage.frombuffer('RGBA', size, frame, 'raw', 'RGBA', 0, -1).convert('RGB')
+    
+    def use_camera_image(self, image):
+        self.current_image = image
+        self.show_preview(self.current_image)
+        self.close_camera()
+    
+    def stop_camera(self):
+        if getattr(self, 'camera_session', None) is None:
+            return
+        self.camera_session = None
+        self.preview_event.cancel()
+        self.camera.play = False
+        # Wake the analysis thread so it can exit
+        self.frame_ready.set()
+    
+    def close_camera(self):
+        self.stop_camera()
+        self.camera_popup.dismiss()
     
     def load_image(self, filepath):
-        # Load and display image
-        self.current_image = PILImage.open(filepath)
-        # Convert PIL image to Kivy texture
-        # This is a simplified version - in practice, you'd need more robust conversion
-        self.image_display.source = filepath
-        self.image_display.reload()
+        # Decode once; the OCR copy and the preview both come from this decode
+        start = time.perf_counter()
+        self.current_image = image_decode.decode_image(filepath)
+        texture = self.show_preview(self.current_image)
+        Logger.info('CardReader: loaded %s as %dx%d (preview %dx%d, %.0f KB texture) in %.0f ms',
+                    os.path.basename(filepath), self.current_image.width, self.current_image.height,
+                    texture.width, texture.height, texture.width * texture.height * 3 / 1024.0,
+                    1000 * (time.perf_counter() - start))
     
-    def extract_information(self, instance):
+    def show_preview(self, image):
+        """Upload a display-sized copy of a PIL image as the preview texture"""
+        preview = image_decode.downscaled(image, PREVIEW_SIZE)
+        if preview.mode != 'RGB':
+            preview = preview.convert('RGB')
+        texture = Texture.create(size=preview.size, colorfmt='rgb')
+        texture.blit_buffer(preview.tobytes(), colorfmt='rgb', bufferfmt='ubyte')
+        # PIL rows run top-down, OpenGL's bottom-up
+        texture.flip_vertical()
+        self.image_display.texture = texture
+        return texture
+    
+    def extract_information(self, instance, skip_quality_check=False):
         if self.current_image is None:
             popup = Popup(title='Error',
                           content=Label(text='Please upload an image first'),
                           size_hint=(0.6, 0.4))
             popup.open()
             return
+        
+        # A vCard/MeCard QR code is exact and much faster than OCR
+        qr_fields = qr_fastpath.read_qr_fields(self.current_image)
+        if qr_fastpath.is_complete(qr_fields):
+            self.extracted_data = qr_fastpath.fill_derived(qr_fields)
+            self.show_results()
+            return
+        
+        if self.quality_check and not skip_quality_check:
+            quality = image_quality.assess_quality(self.current_image, self.quality_thresholds)
+            if not quality['ok']:
+                self.show_quality_warning(quality)
+                return
             
         try:
+            # Rotate upright and pick the languages from a quick OSD pass on a thumbnail
+            upright_image, lang, osd = script_detection.prepare_for_ocr(self.current_image)
+            Logger.info('CardReader: OSD %.0f ms, rotate %d, script %s, lang %s',
+                        1000 * osd['seconds'], osd['rotate'], osd['script'], lang)
+            
             # Preprocess image
-            processed_image = self.preprocess_image(self.current_image)
+            processed_image = self.preprocess_image(upright_image)
             
             # Extract text using pytesseract
-            extracted_text = pytesseract.image_to_string(processed_image)
+            extracted_text = pytesseract.image_to_string(processed_image, lang=lang)
             
-            if not extracted_text.strip():
+            if not extracted_text.strip() and not qr_fields:
                 popup = Popup(title='Error',
                               content=Label(text='No text found in the image'),
                               size_hint=(0.6, 0.4))
                 popup.open()
                 return
             
-            # Extract fields
+            # Extract fields, preferring exact values from a partial QR code
             self.extracted_data = self.extract_all_fields(extracted_text)
+            if qr_fields:
+                self.extracted_data, corrected = qr_fastpath.merge_fields(qr_fields, self.extracted_data)
             
-            # Display results
-            result_text = f"""
+            self.show_results()
+            
+        except Exception as e:
+            popup = Popup(title='Error',
+                          content=Label(text=f'Error processing image: {str(e)}'),
+                          size_hint=(0.6, 0.4))
+            popup.open()
+    
+    def show_results(self):
+        # Display results
+        result_text = f"""
 Name: {self.extracted_data.get('name', '')}
 Email: {self.extracted_data.get('email', '')}
 Phone: {self.extracted_data.get('phone', '')}
@@ -163,278 +345,75 @@ Company: {self.extracted_data.get('company', '')}
 Designation: {self.extracted_data.get('designation', '')}
 Website: {self.extracted_data.get('website', '')}
 Address: {self.extracted_data.get('address', '')}
-            """
-            
-            self.results_label.text = result_text
-            
-        except Exception as e:
-            popup = Popup(title='Error',
-                          content=Label(text=f'Error processing image: {str(e)}'),
-                          size_hint=(0.6, 0.4))
-            popup.open()
+        """
+        
+        self.results_label.text = result_text
+    
+    def show_quality_warning(self, quality):
+        # Let the user retake the picture or run OCR anyway
+        content = BoxLayout(orientation='vertical', spacing=10)
+        content.add_widget(Label(text='\n'.join(quality['issues'])))
+        
+        button_layout = BoxLayout(size_hint_y=None, height=50, spacing=10)
+        retake_btn = Button(text='Retake')
+        anyway_btn = Button(text='Process Anyway')
+        button_layout.add_widget(retake_btn)
+        button_layout.add_widget(anyway_btn)
+        content.add_widget(button_layout)
+        
+        popup = Popup(title='Image Quality', content=content, size_hint=(0.8, 0.5))
+        
+        def process_anyway(*args):
+            popup.dismiss()
+            self.extract_information(None, skip_quality_check=True)
+        
+        retake_btn.bind(on_press=lambda *args: popup.dismiss())
+        anyway_btn.bind(on_press=process_anyway)
+        popup.open()
     
     def preprocess_image(self, image):
         """Enhance image for better OCR results"""
         try:
-            if image.mode != 'L':
-                image = image.convert('L')
-            # Simple enhancement for mobile
-            return image
+            return image_preprocessing.preprocess_image(image)
         except Exception as e:
             return image
     
+    # Field extraction is shared with the Streamlit app; these delegate to card_extraction
     def extract_email(self, text):
         """Extract email address from text"""
-        try:
-            email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-            matches = re.findall(email_pattern, text)
-            return matches[0] if matches else ""
-        except Exception as e:
-            return ""
+        return card_extraction.extract_email(text)
     
     def extract_website_from_email(self, email):
         """Extract website from email - everything after @"""
-        if not email:
-            return ""
-        try:
-            website = email.split('@')[1]
-            return website
-        except:
-            return ""
+        return card_extraction.extract_website_from_email(email)
     
     def extract_company_from_email(self, email):
         """Extract company name from email - remove TLD"""
-        if not email:
-            return ""
-        try:
-            domain = email.split('@')[1]
-            company = re.sub(r'\.(com|net|org|in|co|us|uk|info|biz)$', '', domain)
-            company = company.replace('-', ' ').replace('_', ' ').title()
-            return company
-        except:
-            return ""
+        return card_extraction.extract_company_from_email(email)
     
     def extract_phone_numbers(self, text):
         """Extract phone numbers from text"""
-        try:
-            phone_patterns = [
-                r'[\+]?[9][1]?[-\s]?[6-9]\d{9}',
-                r'[6-9]\d{9}',
-                r'\+\d{1,3} \d{10}',
-                r'\d{5} \d{5}',
-                r'\d{3}[-.\s]?\d{3}[-.\s]?\d{4}',
-                r'\(\d{3}\)\s*\d{3}[-.\s]?\d{4}'
-            ]
-            
-            phones = []
-            for pattern in phone_patterns:
-                matches = re.findall(pattern, text)
-                for match in matches:
-                    clean_phone = re.sub(r'[^\d\+]', '', match)
-                    if len(clean_phone) >= 10 and clean_phone not in phones:
-                        phones.append(clean_phone)
-            
-            return phones[0] if phones else ""
-        except Exception as e:
-            return ""
+        return card_extraction.extract_phone_numbers(text)
     
     def extract_name(self, text_lines):
         """Extract name from text lines"""
-        try:
-            # Look for name in first 3 lines
-            for i, line in enumerate(text_lines[:3]):
-                clean_line = line.strip()
-                if len(clean_line) < 2 or len(clean_line) > 50:
-                    continue
-                # Skip lines with emails, websites, or phone numbers
-                if (re.search(r'@|www|\.com|\.net|\.org|\d{10}', clean_line.lower()) or
-                    any(word in clean_line.lower() for word in ['company', 'ltd', 'inc', 'corp'])):
-                    continue
-                
-                words = clean_line.split()
-                if 1 <= len(words) <= 4:
-                    # Check for proper name capitalization
-                    capital_words = sum(1 for word in words if word and word[0].isupper())
-                    if capital_words >= len(words) * 0.7:
-                        return clean_line
-            
-            # Fallback: first line without obvious contact info
-            for line in text_lines[:5]:
-                clean_line = line.strip()
-                if (len(clean_line) >= 2 and 
-                    not re.search(r'@|www|\.com|\.net|\d{10}', clean_line) and
-                    len(clean_line.split()) <= 4):
-                    return clean_line
-                    
-            return ""
-        except Exception as e:
-            return ""
+        return card_extraction.extract_name(text_lines)
     
     def extract_designation(self, text_lines, extracted_name):
         """Extract designation from text lines"""
-        try:
-            designation_keywords = [
-                'manager', 'director', 'engineer', 'developer', 'analyst', 'consultant', 
-                'specialist', 'executive', 'officer', 'president', 'ceo', 'cto', 'cfo', 
-                'vp', 'head', 'lead', 'senior', 'junior', 'associate', 'assistant',
-                'architect', 'designer', 'coordinator', 'administrator', 'supervisor',
-                'chief', 'partner', 'founder', 'owner', 'principal', 'neurologist', 
-                'doctor', 'physician', 'surgeon', 'sales', 'marketing', 'hr', 'finance'
-            ]
-            
-            # Find name position
-            name_index = -1
-            for i, line in enumerate(text_lines):
-                if line.strip() == extracted_name:
-                    name_index = i
-                    break
-            
-            # Check line after name (most common)
-            if name_index != -1 and name_index + 1 < len(text_lines):
-                next_line = text_lines[name_index + 1].strip()
-                if (2 <= len(next_line) <= 60 and 
-                    not re.search(r'@|www|\.com|\.net|\d{10}', next_line.lower()) and
-                    any(keyword in next_line.lower() for keyword in designation_keywords)):
-                    return next_line
-            
-            # Check line before name
-            if name_index > 0:
-                prev_line = text_lines[name_index - 1].strip()
-                if (2 <= len(prev_line) <= 60 and 
-                    not re.search(r'@|www|\.com|\.net|\d{10}', prev_line.lower()) and
-                    any(keyword in prev_line.lower() for keyword in designation_keywords)):
-                    return prev_line
-            
-            # Search all lines for designation keywords
-            for line in text_lines:
-                clean_line = line.strip()
-                if (clean_line != extracted_name and
-                    2 <= len(clean_line) <= 60 and
-                    any(keyword in clean_line.lower() for keyword in designation_keywords)):
-                    if not (re.search(r'@|www|\.com|\.net', clean_line.lower()) or 
-                           re.search(r'\d{10}', clean_line)):
-                        return clean_line
-            
-            return ""
-        except Exception as e:
-            return ""
+        return card_extraction.extract_designation(text_lines, extracted_name)
     
     def extract_company_name(self, text_lines, extracted_email):
         """Extract company name from text"""
-        try:
-            # First priority: company from email domain
-            company_from_email = self.extract_company_from_email(extracted_email)
-            if company_from_email:
-                return company_from_email
-            
-            # Look for company name in prominent positions
-            company_keywords = [
-                'ltd', 'inc', 'corporation', 'company', 'corp', 'private', 'limited', 
-                'tech', 'solutions', 'enterprises', 'group', 'industries', 'systems', 
-                'technologies', 'international', 'global', 'holdings', 'ventures'
-            ]
-            
-            # Check lines that look like company names
-            for line in text_lines:
-                clean_line = line.strip()
-                if (3 <= len(clean_line) <= 60 and
-                    not re.search(r'@|www|\.com|\.net|\d{10}', clean_line.lower())):
-                    
-                    # Check for company keywords
-                    if any(keyword in clean_line.lower() for keyword in company_keywords):
-                        return clean_line
-                    
-                    # Check for multi-word capitalized names
-                    words = clean_line.split()
-                    if len(words) >= 2:
-                        capital_words = sum(1 for word in words if word and word[0].isupper())
-                        if capital_words >= len(words) * 0.6:
-                            return clean_line
-            
-            return ""
-        except Exception as e:
-            return ""
+        return card_extraction.extract_company_name(text_lines, extracted_email)
     
     def extract_address(self, text):
-        """Extract company address from text - IMPROVED"""
-        try:
-            lines = text.split('\n')
-            address_lines = []
-            
-            # More comprehensive address detection
-            for i, line in enumerate(lines):
-                clean_line = line.strip()
-                if len(clean_line) < 5 or len(clean_line) > 100:
-                    continue
-                    
-                # Address indicators
-                has_number = bool(re.search(r'\d+', clean_line))
-                has_street = bool(re.search(r'street|st|road|rd|avenue|ave|boulevard|blvd|lane|ln|drive|dr', clean_line.lower()))
-                has_building = bool(re.search(r'apartment|apt|flat|building|bldg|block|sector|phase|floor|fl|suite|ste', clean_line.lower()))
-                has_city = bool(re.search(r'\b(mumbai|delhi|bangalore|bengaluru|chennai|kolkata|hyderabad|pune|ahmedabad|surat|jaipur|zirakpur|mohali|chandigarh|gurgaon|noida)\b', clean_line.lower()))
-                has_pincode = bool(re.search(r'\b\d{6}\b', clean_line))
-                has_area = bool(re.search(r'nagar|colony|area|locality|sector|district|state', clean_line.lower()))
-                
-                # Calculate address score
-                address_score = sum([has_number, has_street, has_building, has_city, has_pincode, has_area])
-                
-                # Strong indicators
-                if has_pincode and has_number:
-                    address_lines.append(clean_line)
-                elif address_score >= 3:
-                    address_lines.append(clean_line)
-                elif has_number and (has_street or has_building):
-                    address_lines.append(clean_line)
-            
-            # Clean and format address
-            if address_lines:
-                # Remove non-address lines
-                filtered_address = []
-                for line in address_lines:
-                    if not re.search(r'@|http|www|\.com|\.net|gmail|yahoo', line.lower()):
-                        filtered_address.append(line)
-                
-                if filtered_address:
-                    # Join with proper formatting
-                    address = ', '.join(filtered_address)
-                    return address
-            
-            return ""
-        except Exception as e:
-            return ""
+        """Extract company address from text"""
+        return card_extraction.extract_address(text)
     
     def extract_all_fields(self, text):
-        """Extract all fields from OCR text - IMPROVED"""
-        try:
-            lines = [line.strip() for line in text.split('\n') if line.strip()]
-            
-            # Extract basic contact info first
-            email = self.extract_email(text)
-            phone = self.extract_phone_numbers(text)
-            website = self.extract_website_from_email(email)
-            
-            # Extract name
-            name = self.extract_name(lines)
-            
-            # Extract other fields using name as reference
-            designation = self.extract_designation(lines, name)
-            company = self.extract_company_name(lines, email)
-            address = self.extract_address(text)
-            
-            return {
-                'name': name or "",
-                'email': email or "",
-                'phone': phone or "",
-                'website': website or "",
-                'company': company or "",
-                'designation': designation or "",
-                'address': address or ""
-            }
-        except Exception as e:
-            return {
-                'name': "", 'email': "", 'phone': "", 'website': "", 
-                'company': "", 'designation': "", 'address': ""
-            }
+        """Extract all fields from OCR text"""
+        return card_extraction.extract_all_fields(text)
     
     def save_contact(self, instance):
         if not self.extracted_data:
@@ -0,0 +1,144 @@
+import argparse
+import glob
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Written by the tuning command, read by the batch paths at startup
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ocr_tuning.json')
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+_config = None
+_slots = None
+_slots_lock = threading.Lock()
+
+
+def load_config(path=CONFIG_PATH):
+    """Saved tuning result, or {} if the host has not been tuned"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def startup(path=CONFIG_PATH):
+    """Apply the tuned tesseract thread limit (once per process) and return the config.
+
+    An OMP_THREAD_LIMIT already set in the environment wins over the file.
+    """
+    global _config
+    if _config is None:
+        _config = load_config(path)
+        if _config.get('omp_thread_limit'):
+            # Inherited by every tesseract process started from here on
+            os.environ.setdefault('OMP_THREAD_LIMIT', str(_config['omp_thread_limit']))
+    return _config
+
+
+def tuned_workers(default=DEFAULT_WORKERS):
+    """Number of cards to OCR in parallel on this host"""
+    return startup().get('workers') or default
+
+
+def tesseract_slots():
+    """Semaphore every tesseract call in the process holds while it runs.
+
+    Pages, cards and field re-reads are parallel at several levels (batch, page,
+    refinement), so the total number of tesseract processes is capped here, at the
+    tuned worker count, rather than by any one pool.
+    """
+    global _slots
+    with _slots_lock:
+        if _slots is None:
+            _slots = threading.BoundedSemaphore(tuned_workers())
+        return _slots
+
+
+def set_tesseract_slots(slots):
+    """Replace the tesseract cap with a count (or a semaphore); returns the previous semaphore"""
+    global _slots
+    if isinstance(slots, int):
+        slots = threading.BoundedSemaphore(slots)
+    with _slots_lock:
+        previous, _slots = _slots, slots
+    return previous
+
+
+# ---------- TUNING ----------
+def _run(images, workers):
+    # card_pipeline reads the tuned config on import
+    from card_pipeline import process_card
+    # Same cap on tesseract processes as production would run with this many workers
+    previous = set_tesseract_slots(workers)
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(process_card, images))
+        return time.perf_counter() - start
+    finally:
+        set_tesseract_slots(previous)
+
+
+def benchmark(images, worker_grid, thread_grid, repeat=1):
+    """Cards/second of the OCR pipeline for every workers x OMP_THREAD_LIMIT combination"""
+    previous = os.environ.get('OMP_THREAD_LIMIT')
+    rows = []
+    try:
+        for threads in thread_grid:
+            os.environ['OMP_THREAD_LIMIT'] = str(threads)
+            for workers in worker_grid:
+                seconds = min(_run(images, workers) for _ in range(repeat))
+                rows.append({'workers': workers, 'omp_thread_limit': threads,
+                             'cards_per_second': len(images) / seconds})
+    finally:
+        if previous is None:
+            os.environ.pop('OMP_THREAD_LIMIT', None)
+        else:
+            os.environ['OMP_THREAD_LIMIT'] = previous
+    return rows
+
+
+def _grid(value, limit):
+    if value:
+        return [int(v) for v in value.split(',')]
+    grid = [1]
+    while grid[-1] * 2 <= limit:
+        grid.append(grid[-1] * 2)
+    return grid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the fastest OCR parallelism for this host")
+    parser.add_argument('images', nargs='+', help="Sample card images")
+    parser.add_argument('--workers', help="Comma-separated worker counts (default: 1, 2, 4 ... CPUs)")
+    parser.add_argument('--threads', help="Comma-separated OMP_THREAD_LIMIT values (default: 1, 2, 4 ... CPUs)")
+    parser.add_argument('--repeat', type=int, default=1, help="Runs per combination; the fastest counts")
+    parser.add_argument('--output', default=CONFIG_PATH)
+    args = parser.parse_args()
+
+    import image_decode
+    paths = [p for pattern in args.images for p in sorted(glob.glob(pattern))]
+    if not paths:
+        parser.error("no images found")
+    images = [image_decode.decode_image(p) for p in paths]
+    cpus = os.cpu_count() or 1
+
+    print(f"{len(images)} sample cards, {cpus} CPUs")
+    print(f"{'workers':>8} {'threads':>8} {'cards/s':>9}")
+    rows = benchmark(images, _grid(args.workers, cpus), _grid(args.threads, cpus), args.repeat)
+    for row in rows:
+        print(f"{row['workers']:>8} {row['omp_thread_limit']:>8} {row['cards_per_second']:>9.2f}")
+
+    best = max(rows, key=lambda r: r['cards_per_second'])
+    config = dict(best, cpus=cpus, samples=len(images), tuned_at=time.strftime('%Y-%m-%d %H:%M:%S'))
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=2)
+    print(f"Best: {best['workers']} workers x OMP_THREAD_LIMIT={best['omp_thread_limit']} "
+          f"({best['cards_per_second']:.2f} cards/s) -> {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+import io
+import re
+import numpy as np
+
+import image_decode
+from card_extraction import extract_company_from_email, extract_website_from_email
+from vcard import iter_vcards
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+FIELDS = ['name', 'email', 'phone', 'website', 'company', 'designation', 'address']
+# With these present the QR code replaces OCR entirely
+REQUIRED_FIELDS = ['name', 'email', 'phone']
+QR_SIZE = 1000
+
+# vCard columns (as parsed by vcard.iter_vcards) -> extraction field names
+VCARD_FIELDS = {'Name': 'name', 'Email': 'email', 'Phone': 'phone', 'Website': 'website',
+                'Company': 'company', 'Designation': 'designation', 'Address': 'address'}
+MECARD_FIELDS = {'N': 'name', 'EMAIL': 'email', 'TEL': 'phone', 'URL': 'website',
+                 'ORG': 'company', 'TITLE': 'designation', 'ADR': 'address'}
+
+
+# ---------- DETECTION ----------
+def _gray_array(image, max_side):
+    small = image_decode.downscaled(image, max_side)
+    if small.mode != 'L':
+        small = small.convert('L')
+    return np.asarray(small)
+
+
+def find_qr_payloads(image, max_side=QR_SIZE):
+    """Decode the card's QR code on a downscaled copy; retries at full size if it was found but not read"""
+    if cv2 is None:
+        return []
+    detector = cv2.QRCodeDetector()
+    for size in (max_side, max(image.size)):
+        gray = _gray_array(image, size)
+        try:
+            # Cards carry one code; the single-code detector is faster and more forgiving
+            payload, points, _ = detector.detectAndDecode(gray)
+        except cv2.error:
+            return []
+        payloads = [payload] if payload else []
+        if payloads or points is None or size >= max(image.size):
+            return payloads
+    return []
+
+
+# ---------- PAYLOAD PARSING ----------
+def _empty_fields():
+    return {field: '' for field in FIELDS}
+
+
+def parse_vcard(payload):
+    """Fields of the first contact in a vCard payload"""
+    fields = _empty_fields()
+    for card in iter_vcards(io.StringIO(payload)):
+        for column, field in VCARD_FIELDS.items():
+            fields[field] = card.get(column, '')
+        break
+    return fields
+
+
+def parse_mecard(payload):
+    """Fields of a MECARD:N:Doe,John;TEL:...;EMAIL:...;; payload"""
+    fields = _empty_fields()
+    body = payload[len('MECARD:'):]
+    # Split on unescaped ';'
+    for part in re.split(r'(?<!\\);', body):
+        if ':' not in part:
+            continue
+        key, value = part.split(':', 1)
+        value = re.sub(r'\\(.)', r'\1', value).strip()
+        field = MECARD_FIELDS.get(key.upper())
+        if not field or fields[field]:
+            continue
+        if key.upper() == 'N' and ',' in value:
+            last, first = value.split(',', 1)
+            value = f"{first.strip()} {last.strip()}".strip()
+        fields[field] = value
+    return fields
+
+
+def parse_payload(payload):
+    """Contact fields a vCard, MeCard or URL payload states explicitly; {} for anything else"""
+    text = payload.strip()
+    upper = text.upper()
+    if upper.startswith('BEGIN:VCARD'):
+        fields = parse_vcard(text)
+    elif upper.startswith('MECARD:'):
+        fields = parse_mecard(text)
+    elif re.match(r'^(https?://|www\.)\S+$', text, re.IGNORECASE):
+        fields = _empty_fields()
+        fields['website'] = text
+    else:
+        return {}
+
+    # Same conventions as OCR extraction
+    fields['website'] = re.sub(r'^https?://', '', fields['website'], flags=re.IGNORECASE).rstrip('/')
+    fields['phone'] = re.sub(r'[^\d\+]', '', fields['phone'])
+    return fields
+
+
+def fill_derived(fields):
+    """Copy of fields with an empty website and company guessed from the email domain, as OCR extraction does"""
+    fields = dict(fields)
+    if not fields.get('website'):
+        fields['website'] = extract_website_from_email(fields.get('email', ''))
+    if not fields.get('company'):
+        fields['company'] = extract_company_from_email(fields.get('email', ''))
+    return fields
+
+
+def read_qr_fields(image):
+    """Contact fields from the first QR code on the card that carries any; {} if none"""
+    for payload in find_qr_payloads(image):
+        fields = parse_payload(payload)
+        if fields:
+            return fields
+    return {}
+
+
+def is_complete(fields):
+    """Whether the QR fields are enough to skip OCR"""
+    return bool(fields) and all(fields.get(field) for field in REQUIRED_FIELDS)
+
+
+def merge_fields(qr_fields, ocr_fields):
+    """Fill gaps in the QR fields from OCR; values the QR code states win where both exist.
+
+    Website and company guessed from the email domain only fill fields still empty.
+    """
+    merged = dict(ocr_fields)
+    corrected = []
+    for field, value in qr_fields.items():
+        if not value:
+            continue
+        if merged.get(field) and merged[field] != value:
+            corrected.append(field)
+        merged[field] = value
+    return fill_derived(merged), corrected
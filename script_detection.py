@@ -0,0 +1,89 @@
+import functools
+import time
+import pytesseract
+from PIL import Image
+
+import image_decode
+import ocr_tuning
+
+# OSD only needs a few lines of text at readable size
+OSD_SIZE = 1000
+# Below these tesseract is guessing; keep the image as it is and OCR with the default languages
+MIN_ORIENTATION_CONFIDENCE = 2.0
+MIN_SCRIPT_CONFIDENCE = 1.0
+# Emails, phones and websites are Latin on every card, so English is always loaded
+BASE_LANGUAGE = 'eng'
+
+# Tesseract OSD script name -> traineddata for that script on our cards
+SCRIPT_LANGUAGES = {
+    'Latin': [],
+    'Devanagari': ['hin'],
+    'Bengali': ['ben'],
+    'Gujarati': ['guj'],
+    'Gurmukhi': ['pan'],
+    'Kannada': ['kan'],
+    'Malayalam': ['mal'],
+    'Tamil': ['tam'],
+    'Telugu': ['tel'],
+    'Oriya': ['ori'],
+    'Arabic': ['ara'],
+    'Cyrillic': ['rus'],
+    'Greek': ['ell'],
+    'Han': ['chi_sim'],
+    'Japanese': ['jpn'],
+    'Hangul': ['kor'],
+    'Thai': ['tha'],
+}
+
+# Clockwise correction reported by OSD -> PIL transpose
+_ROTATIONS = {90: Image.ROTATE_270, 180: Image.ROTATE_180, 270: Image.ROTATE_90}
+
+
+@functools.lru_cache(maxsize=1)
+def installed_languages():
+    """Traineddata files tesseract can load"""
+    try:
+        return frozenset(pytesseract.get_languages(config=''))
+    except Exception as e:
+        return frozenset()
+
+
+def ocr_languages(script):
+    """Minimal tesseract lang string for a script, limited to what is installed; None for the default"""
+    available = installed_languages()
+    wanted = [BASE_LANGUAGE] + SCRIPT_LANGUAGES.get(script, [])
+    languages = [lang for lang in wanted if lang in available]
+    return '+'.join(languages) or None
+
+
+def detect_orientation(image):
+    """Rotation and script of a card from tesseract OSD on a thumbnail"""
+    start = time.perf_counter()
+    result = {'rotate': 0, 'script': None, 'orientation_conf': 0.0, 'script_conf': 0.0}
+    if 'osd' in installed_languages():
+        thumb = image_decode.downscaled(image, OSD_SIZE)
+        if thumb.mode != 'L':
+            thumb = thumb.convert('L')
+        try:
+            with ocr_tuning.tesseract_slots():
+                osd = pytesseract.image_to_osd(thumb, config='--psm 0', output_type=pytesseract.Output.DICT)
+            if osd['orientation_conf'] >= MIN_ORIENTATION_CONFIDENCE:
+                result['rotate'] = osd['rotate']
+            if osd['script_conf'] >= MIN_SCRIPT_CONFIDENCE:
+                result['script'] = osd['script']
+            result['orientation_conf'] = osd['orientation_conf']
+            result['script_conf'] = osd['script_conf']
+        except pytesseract.TesseractError:
+            # Too little text for OSD; the defaults are the best guess
+            pass
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def prepare_for_ocr(image):
+    """Upright image and the lang string for the main OCR pass, plus the OSD result"""
+    osd = detect_orientation(image)
+    if osd['rotate'] in _ROTATIONS:
+        image = image.transpose(_ROTATIONS[osd['rotate']])
+    osd['lang'] = ocr_languages(osd['script'])
+    return image, osd['lang'], osd
@@ -0,0 +1,28 @@
+import os
+
+import pytest
+
+import card_storage
+
+
+def test_concurrent_writers_lose_nothing(tmp_path):
+    # 2 writer processes x 20 records, each deleting every 5th of its own
+    result = card_storage.stress_test(str(tmp_path / 'cards.csv'), writers=2, records=20, delete_every=5)
+    assert result['expected'] == 32
+    assert result['lost'] == 0
+    assert result['undeleted'] == 0
+    assert result['unique_ids'] == result['found']
+
+
+def test_stress_test_refuses_an_existing_database(tmp_path):
+    csv_path = tmp_path / 'cards.csv'
+    csv_path.write_text('Id,Name\nabc,Keep Me\n', encoding='utf-8')
+    with pytest.raises(FileExistsError):
+        card_storage.stress_test(str(csv_path), writers=1, records=1)
+    assert csv_path.read_text(encoding='utf-8') == 'Id,Name\nabc,Keep Me\n'
+
+
+def test_stress_test_defaults_to_a_fresh_database():
+    result = card_storage.stress_test(writers=1, records=3, delete_every=0)
+    assert os.path.exists(result['db'])
+    assert result['found'] == 3
@@ -0,0 +1,74 @@
+import io
+import os
+
+# Standard library only: the Kivy build has no pandas and parses vCard QR codes with this
+
+
+def _open_text(source):
+    """Return a text stream for a path or (binary) file object"""
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, 'r', encoding='utf-8', errors='replace')
+    if isinstance(source, io.TextIOBase):
+        return source
+    return io.TextIOWrapper(source, encoding='utf-8', errors='replace')
+
+
+def _unfold_lines(stream):
+    """Yield logical vCard lines, joining folded continuation lines"""
+    pending = None
+    for raw in stream:
+        line = raw.rstrip('\r\n')
+        if line[:1] in (' ', '\t') and pending is not None:
+            pending += line[1:]
+            continue
+        if pending is not None:
+            yield pending
+        pending = line
+    if pending is not None:
+        yield pending
+
+
+def _vcard_value(value):
+    """Unescape a vCard property value"""
+    return (value.replace('\\n', ' ').replace('\\N', ' ').replace('\\,', ',')
+            .replace('\\;', ';').replace('\\\\', '\\').strip())
+
+
+def iter_vcards(source):
+    """Stream contacts out of a vCard file one card at a time"""
+    stream = _open_text(source)
+    try:
+        card = None
+        for line in _unfold_lines(stream):
+            if ':' not in line:
+                continue
+            key, value = line.split(':', 1)
+            prop = key.split(';')[0].split('.')[-1].upper()
+            if prop == 'BEGIN' and value.strip().upper() == 'VCARD':
+                card = {}
+            elif prop == 'END' and card is not None:
+                yield card
+                card = None
+            elif card is None:
+                continue
+            elif prop == 'FN':
+                card['Name'] = _vcard_value(value)
+            elif prop == 'N' and 'Name' not in card:
+                parts = [_vcard_value(p) for p in value.split(';')]
+                card['Name'] = ' '.join(p for p in parts[1:2] + parts[0:1] if p)
+            elif prop == 'EMAIL' and 'Email' not in card:
+                card['Email'] = _vcard_value(value)
+            elif prop == 'TEL' and 'Phone' not in card:
+                card['Phone'] = _vcard_value(value)
+            elif prop == 'TITLE':
+                card['Designation'] = _vcard_value(value)
+            elif prop == 'ORG':
+                card['Company'] = _vcard_value(value.split(';')[0])
+            elif prop == 'URL' and 'Website' not in card:
+                card['Website'] = _vcard_value(value)
+            elif prop == 'ADR' and 'Address' not in card:
+                parts = [_vcard_value(p) for p in value.split(';')]
+                card['Address'] = ', '.join(p for p in parts if p)
+    finally:
+        if isinstance(source, (str, os.PathLike)):
+            stream.close()
@@ -0,0 +1,253 @@
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import card_storage
+import image_decode
+import ocr_tuning
+from card_pipeline import process_page, contact_record
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+STATE_FILE = '.card_ingest.json'
+STATUS_FILE = '.card_ingest_status.json'
+
+logger = logging.getLogger(__name__)
+
+
+def _is_card_image(path):
+    name = os.path.basename(path)
+    return not name.startswith('.') and name.lower().endswith(IMAGE_EXTENSIONS)
+
+
+def _file_key(path):
+    """(size, mtime_ns) of a file, or None if it vanished"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _write_json(path, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+class FolderIngester:
+    """Watch a folder and push new card images through OCR into the database"""
+
+    def __init__(self, folder, csv_path, workers=2, settle_seconds=2.0, poll_interval=1.0):
+        self.folder = folder
+        self.csv_path = csv_path
+        self.workers = workers
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.state_path = os.path.join(folder, STATE_FILE)
+        self.status_path = os.path.join(folder, STATUS_FILE)
+
+        self.processed = self._load_state()
+        self.pending = {}        # path -> (file key, time the key was last seen changing)
+        self.in_flight = set()
+        self.results = []        # (path, key, records, outcome) waiting to be committed
+        self.lock = threading.Lock()
+        self.counters = {'processed': 0, 'stored': 0, 'no_text': 0, 'failed': 0, 'cards': 0}
+        self.started = time.time()
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.observer = None
+
+    # ---------- STATE ----------
+    def _load_state(self):
+        try:
+            with open(self.state_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def stats(self):
+        """Queue depth and throughput counters"""
+        with self.lock:
+            elapsed = max(time.time() - self.started, 1e-9)
+            return dict(self.counters,
+                        queued=len(self.pending),
+                        in_flight=len(self.in_flight),
+                        cards_per_minute=60.0 * self.counters['processed'] / elapsed)
+
+    # ---------- DISCOVERY ----------
+    def notice(self, path):
+        """Mark a file as changed; it is processed once it stops changing"""
+        if not _is_card_image(path):
+            return
+        key = _file_key(path)
+        with self.lock:
+            if key is None or path in self.in_flight or self.processed.get(path) == key:
+                self.pending.pop(path, None)
+                return
+            previous = self.pending.get(path)
+            if previous is None or previous[0] != key:
+                self.pending[path] = (key, time.time())
+
+    def scan(self):
+        """Poll the folder for new or changed images"""
+        try:
+            entries = list(os.scandir(self.folder))
+        except OSError:
+            return
+        for entry in entries:
+            if entry.is_file():
+                self.notice(entry.path)
+
+    def start_watching(self):
+        """Use filesystem notifications (inotify etc.) when watchdog is installed"""
+        if Observer is None:
+            return False
+        ingester = self
+
+        class Handler(FileSystemEventHandler):
+            def on_created(self, event):
+                if not event.is_directory:
+                    ingester.notice(event.src_path)
+
+            def on_modified(self, event):
+                if not event.is_directory:
+                    ingester.notice(event.src_path)
+
+            def on_moved(self, event):
+                if not event.is_directory:
+                    ingester.notice(event.dest_path)
+
+        self.observer = Observer()
+        self.observer.schedule(Handler(), self.folder, recursive=False)
+        self.observer.start()
+        return True
+
+    # ---------- PROCESSING ----------
+    def _process(self, path, key):
+        records = []
+        try:
+            # Flatbed scans often hold a page of cards; each becomes its own record
+            page = image_decode.decode_image(path, image_decode.PAGE_SIZE)
+            for region, text, fields in process_page(page, self.workers):
+                if fields:
+                    records.append(contact_record(fields, path, path, region))
+            outcome = 'stored' if records else 'no_text'
+        except Exception:
+            logger.exception("Failed to process %s", path)
+            outcome = 'failed'
+        with self.lock:
+            self.counters[outcome] += 1
+            self.counters['processed'] += 1
+            self.counters['cards'] += len(records)
+            self.results.append((path, key, records, outcome))
+
+    def dispatch(self):
+        """Submit files that have stopped changing, keeping at most 2 x workers in flight"""
+        now = time.time()
+        with self.lock:
+            ready = [(p, k) for p, (k, seen) in self.pending.items() if now - seen >= self.settle_seconds]
+            capacity = 2 * self.workers - len(self.in_flight)
+            for path, key in ready[:max(capacity, 0)]:
+                # The size/mtime must still match what settled
+                current = _file_key(path)
+                if current != key:
+                    if current is None:
+                        del self.pending[path]
+                    else:
+                        self.pending[path] = (current, now)
+                    continue
+                del self.pending[path]
+                self.in_flight.add(path)
+                self.executor.submit(self._process, path, key)
+
+    def commit(self):
+        """Write finished cards to the database in one batch, then record them as processed"""
+        with self.lock:
+            results, self.results = self.results, []
+        if not results:
+            return
+        records = [record for _, _, file_records, _ in results for record in file_records]
+        if records:
+            card_storage.append_records(self.csv_path, records)
+        with self.lock:
+            for path, key, file_records, outcome in results:
+                # Failures are recorded too, so a bad file is retried only after it changes
+                self.in_flight.discard(path)
+                self.processed[path] = key
+            state = dict(self.processed)
+        _write_json(self.state_path, state)
+
+    def run(self, report_interval=30.0, once=False):
+        """Main loop: discover, dispatch, commit, report"""
+        watching = self.start_watching()
+        print(f"Watching {self.folder} ({'notifications' if watching else 'polling'}), "
+              f"{self.workers} workers -> {self.csv_path}")
+        self.scan()
+        last_scan = last_report = time.time()
+        try:
+            while True:
+                now = time.time()
+                # With notifications a slow rescan only catches missed events
+                if not watching or now - last_scan >= 30 * self.poll_interval:
+                    self.scan()
+                    last_scan = now
+                self.dispatch()
+                self.commit()
+
+                if now - last_report >= report_interval:
+                    self.report()
+                    last_report = now
+                if once and not self.pending and not self.in_flight:
+                    break
+                time.sleep(self.poll_interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if self.observer is not None:
+                self.observer.stop()
+            self.executor.shutdown(wait=True)
+            self.commit()
+            self.report()
+
+    def report(self):
+        stats = self.stats()
+        _write_json(self.status_path, stats)
+        print(f"queued={stats['queued']} in_flight={stats['in_flight']} processed={stats['processed']} "
+              f"stored={stats['stored']} ({stats['cards']} cards) no_text={stats['no_text']} failed={stats['failed']} "
+              f"({stats['cards_per_minute']:.1f} cards/min)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest card images dropped into a folder")
+    parser.add_argument('folder', help="Folder the scanner or phone sync writes to")
+    parser.add_argument('--db', default=os.path.join('visiting_cards_data', 'cards_data.csv'))
+    parser.add_argument('--workers', type=int, help="OCR workers (default: the ocr_tuning.py result, else 2)")
+    parser.add_argument('--settle', type=float, default=2.0,
+                        help="Seconds a file must stay unchanged before it is processed")
+    parser.add_argument('--poll-interval', type=float, default=1.0)
+    parser.add_argument('--report-interval', type=float, default=30.0)
+    parser.add_argument('--once', action='store_true', help="Process what is there now, then exit")
+    args = parser.parse_args()
+    logging.basicConfig(format='%(asctime)s %(levelname)s %(message)s')
+
+    os.makedirs(os.path.dirname(args.db) or '.', exist_ok=True)
+    workers = args.workers or ocr_tuning.tuned_workers(2)
+    if args.workers:
+        # An explicit worker count also sets how many tesseract processes may run at once
+        ocr_tuning.set_tesseract_slots(args.workers)
+    ingester = FolderIngester(args.folder, args.db, workers, args.settle, args.poll_interval)
+    ingester.run(args.report_interval, args.once)
+
+
+if __name__ == '__main__':
+    main()